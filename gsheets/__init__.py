@@ -4,9 +4,11 @@
 
 from .api import Sheets
 from .backend import build_service
+from .changes import diff
 from .oauth2 import get_credentials
+from .profiling import profile
 
-__all__ = ['Sheets', 'get_credentials', 'build_service']
+__all__ = ['Sheets', 'diff', 'profile', 'get_credentials', 'build_service']
 
 __title__ = 'gsheets'
 __version__ = '0.6.2.dev0'
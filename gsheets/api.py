@@ -1,16 +1,29 @@
 """Main interface for the library user."""
 
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
+import collections
 import functools
+import itertools
+import threading
 
 from . import backend
+from . import metrics
 from . import models
 from . import oauth2
+from . import profiling
+from . import tracing
 from . import tools
 from . import urls
 
 __all__ = ['Sheets']
 
+PREFETCH_DEPTH = 4
+
+FETCH_DEFAULTS = {'sheets': None, 'fill_value': models.FILL_VALUE,
+                  'intern_strings': False,
+                  'value_render_option': backend.VALUE_RENDER_OPTION,
+                  'date_time_render_option': backend.DATE_TIME_RENDER_OPTION}
+
 # TODO: get worksheet
 
 
@@ -48,7 +61,8 @@ class Sheets:
         """
         return cls(credentials=None, developer_key=developer_key)
 
-    def __init__(self, credentials=None, developer_key=None) -> None:
+    def __init__(self, credentials=None, developer_key=None, *, http=None,
+                 num_retries: int = 0) -> None:
         """To access private data, you must provide OAuth2 credentials with
         access to the resource.
 
@@ -60,26 +74,93 @@ class Sheets:
                 OAauth 2.0 credentials
             developer_key (str): Google API key authorized for Drive
                 and Sheets APIs
+            http: ``httplib2.Http``-like object to send the requests with
+                instead of ``credentials``, shared by all service endpoints
+                and worker threads, i.e. it must be thread-safe (e.g.
+                ``gsheets.replay.ReplayHttp`` for offline use), or callable
+                returning a new one for each service endpoint (e.g.
+                ``lambda: google_auth_httplib2.AuthorizedHttp(creds)``)
+            num_retries (int): retries with exponential backoff for requests
+                failing with server errors or rate limits
         Raises:
-            ValueEreror: If both ``credentials`` and ``developer_key`` are ``None``.
+            ValueEreror: If ``credentials``, ``developer_key``, and ``http`` are ``None``
+                or if both ``credentials`` and ``http`` are given.
         """
-        if credentials is None and developer_key is None:
-            raise ValueError('need credentials or developer_key')
+        if credentials is None and developer_key is None and http is None:
+            raise ValueError('need credentials, developer_key, or http')
+        if credentials is not None and http is not None:
+            raise ValueError('credentials and http are mutually exclusive')
 
         self._creds = credentials
         self._developer_key = developer_key
+        self._http = http
+        self._metrics = metrics.Metrics(num_retries=num_retries)
+        self._flight = tools.SingleFlight()  # coalesces concurrent fetches
+        self._local = threading.local()  # service endpoints of worker threads
+
+    def _build_service(self, name):
+        if callable(self._http):
+            kwargs = {'http': self._http()}
+        elif self._http is not None:
+            kwargs = {'http': self._http}
+        else:
+            kwargs = {'credentials': self._creds}
+        return backend.build_service(name, developerKey=self._developer_key,
+                                     metrics=self._metrics, **kwargs)
 
     @functools.cached_property
     def _sheets(self):
         """Google sheets API service endpoint (v4)."""
-        return backend.build_service('sheets', credentials=self._creds,
-                                     developerKey=self._developer_key)
+        return self._build_service('sheets')
 
     @functools.cached_property
     def _drive(self):
         """Google drive API service endpoint (v3)."""
-        return backend.build_service('drive', credentials=self._creds,
-                                     developerKey=self._developer_key)
+        return self._build_service('drive')
+
+    def _thread_sheets(self):
+        """Return a Google sheets API service endpoint for the current thread.
+
+        The HTTP connections of a service endpoint are not thread-safe.
+        """
+        try:
+            return self._local.sheets
+        except AttributeError:
+            service = self._build_service('sheets')
+            self._local.sheets = service
+            return service
+
+    def on_request(self, func):
+        """Register ``func`` to be called with a ``RequestEvent`` before each API request.
+
+        Returns ``func`` (usable as decorator).
+        """
+        self._metrics.on_request.append(func)
+        return func
+
+    def on_response(self, func):
+        """Register ``func`` to be called with a ``RequestEvent`` after each API request.
+
+        Returns ``func`` (usable as decorator). The event has the measured
+        ``seconds``, ``status``, ``retries``, ``bytes``, ``cells``, and ``error``.
+        """
+        self._metrics.on_response.append(func)
+        return func
+
+    def stats(self) -> dict[str, dict]:
+        """Return the API request counters by operation.
+
+        Returns:
+            dict: mapping from operation (e.g. ``'values.batchGet'``) to dict
+                with the numbers of ``requests``, ``errors``, ``retries``,
+                ``bytes``, and ``cells``, the total ``seconds``, and
+                ``statuses`` (counts by HTTP status)
+        """
+        return self._metrics.stats()
+
+    def stats_to_prometheus(self) -> str:
+        """Return the API request counters in Prometheus text exposition format."""
+        return self._metrics.to_prometheus()
 
     def __len__(self) -> int:
         """Return the number of available spreadsheets.
@@ -124,29 +205,193 @@ class Sheets:
         """
         if id == slice(None, None):
             return list(self)
-        response = backend.spreadsheet(self._sheets, id)
-        result = models.SpreadSheet._from_response(response, self._sheets)
+        result = self._fetch(id)
+        if result is None:
+            raise KeyError(id)
+        return result
+
+    def _fetch(self, id, *, service=None, **kwargs):
+        """Return the fetched spreadsheet or ``None`` if it is not found.
+
+        Concurrent calls for the same ``id`` and ``kwargs`` share one fetch
+        (ignoring arguments equal to their default).
+        """
+        if kwargs.get('sheets') is not None:
+            kwargs['sheets'] = tuple(kwargs['sheets'])
+        defaults = FETCH_DEFAULTS
+        key = (id, tuple(sorted((k, v) for k, v in kwargs.items()
+                                if (type(v), v) != (type(defaults[k]), defaults[k]))))
+        return self._flight.do(key, self._fetch_once, id, service, kwargs)
+
+    def _fetch_once(self, id, service, kwargs):
+        with (profiling.phase(f'spreadsheet {id}'),
+              tracing.span('gsheets.fetch', spreadsheet_id=id)):
+            if service is None:
+                service = self._sheets
+            try:
+                response = backend.spreadsheet(service, id)
+            except KeyError:
+                return None
+            return self._from_response(response, service=service, **kwargs)
+
+    def _fetch_threaded(self, id, **kwargs):
+        """Fetch using the service of the current (worker) thread."""
+        result = self._fetch(id, service=self._thread_sheets(), **kwargs)
+        if result is None:
+            raise KeyError(id)
+        result._service = None  # use self._sheets from now on
+        return result
+
+    def _from_response_threaded(self, response, **kwargs):
+        """Fetch values using the service of the current (worker) thread."""
+        id = response['spreadsheetId']
+        with (profiling.phase(f'spreadsheet {id}'),
+              tracing.span('gsheets.fetch', spreadsheet_id=id)):
+            result = self._from_response(response, service=self._thread_sheets(),
+                                         **kwargs)
+        result._service = None  # use self._sheets from now on
+        return result
+
+    def coalescing_stats(self) -> dict[str, int]:
+        """Return counters of fetches coalesced by concurrent calls with the same id.
+
+        Returns:
+            dict: numbers of executed fetch ``calls`` and of ``merged`` calls
+                that waited for the result of a running fetch
+        """
+        return self._flight.stats()
+
+    def _from_response(self, response, *, service, **kwargs):
+        result = models.SpreadSheet._from_response(response, service, **kwargs)
         result._api = self
         return result
 
-    def get(self, id_or_url, default=None):
+    def iter_prefetch(self, depth: int = PREFETCH_DEPTH,
+                      ids: Iterable[str] | None = None) -> Iterator[models.SpreadSheet]:
+        """Fetch and yield spreadsheets with up to ``depth`` fetches in flight ahead.
+
+        Args:
+            depth (int): maximal number of spreadsheets fetched in background
+                threads ahead of the consumer
+            ids: iterable of spreadsheet ids (default: all available)
+        Yields:
+            new SpreadSheet instances (in order)
+        Raises:
+            ValueError: if ``depth`` is smaller than one
+            KeyError: if no spreadsheet with a given id is found
+
+        Fetching stops when the consumer is ``depth`` spreadsheets behind and is
+        cancelled when the generator is closed (e.g. leaving a ``for`` loop early).
+        """
+        if depth < 1:
+            raise ValueError(f'depth must be a positive integer: {depth!r}')
+        if ids is None:
+            ids = (id for id, _ in backend.iterfiles(self._drive))
+        ids = iter(ids)
+
+        import concurrent.futures
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=depth,
+                                                         thread_name_prefix='gsheets')
+        pending = collections.deque()
+        try:
+            for id in itertools.islice(ids, depth):
+                pending.append(tools.submit(executor, self._fetch_threaded, id))
+            while pending:
+                result = pending.popleft().result()
+                for id in itertools.islice(ids, 1):
+                    pending.append(tools.submit(executor, self._fetch_threaded, id))
+                yield result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get(self, id_or_url, default=None, *, sheets=None,
+            fill_value=models.FILL_VALUE, intern_strings=False,
+            value_render_option=backend.VALUE_RENDER_OPTION,
+            date_time_render_option=backend.DATE_TIME_RENDER_OPTION):
         """Fetch and return the spreadsheet with the given id or url.
 
         Args:
             id_or_url (str): unique alphanumeric id or URL of the spreadsheet
+            sheets: iterable of worksheet titles (``str``) and/or ids (``int``)
+                to fetch values for (default: the ``#gid=`` of the URL or all)
+            fill_value: value for trailing empty cells omitted by the API
+            intern_strings (bool): share one object for equal strings
+                (saves memory for repetitive categorical values)
+            value_render_option (str): ``'FORMATTED_VALUE'``,
+                ``'UNFORMATTED_VALUE'`` (default), or ``'FORMULA'``
+            date_time_render_option (str): ``'FORMATTED_STRING'`` (default)
+                or ``'SERIAL_NUMBER'`` (see ``WorkSheet.records()`` and
+                ``WorkSheet.to_frame()`` argument ``dates``)
         Returns:
             New SpreadSheet instance or given default if none is found
         Raises:
             ValueError: if an URL is given from which no id could be extracted
+            KeyError: if a worksheet from ``sheets`` is not found
         """
         if '/' in id_or_url:
-            id = urls.SheetUrl.from_string(id_or_url).id
+            url = urls.SheetUrl.from_string(id_or_url, default_gid=None)
+            id = url.id
+            if sheets is None and url.gid is not None:
+                sheets = [url.gid]
         else:
             id = id_or_url
-        try:
-            return self[id]
-        except KeyError:
-            return default
+        result = self._fetch(id, sheets=sheets, fill_value=fill_value,
+                             intern_strings=intern_strings,
+                             value_render_option=value_render_option,
+                             date_time_render_option=date_time_render_option)
+        return default if result is None else result
+
+    def get_many(self, ids_or_urls, *, max_workers: int = PREFETCH_DEPTH,
+                 batch_size: int = backend.BATCH_SIZE,
+                 fill_value=models.FILL_VALUE, intern_strings=False,
+                 value_render_option=backend.VALUE_RENDER_OPTION,
+                 date_time_render_option=backend.DATE_TIME_RENDER_OPTION
+                 ) -> dict[str, models.SpreadSheet | Exception]:
+        """Fetch the spreadsheets with the given ids or urls.
+
+        Args:
+            ids_or_urls: iterable of unique alphanumeric ids or URLs of spreadsheets
+            max_workers (int): maximal number of values fetched concurrently
+            batch_size (int): maximal number of meta data requests per batch request
+            fill_value: value for trailing empty cells omitted by the API
+            intern_strings (bool): share one object for equal strings
+            value_render_option (str): see ``get()``
+            date_time_render_option (str): see ``get()``
+        Returns:
+            dict: mapping from id to new SpreadSheet instance or to the
+                exception raised for it (``KeyError`` if not found)
+        Raises:
+            ValueError: if an URL is given from which no id could be extracted
+
+        Fetches the meta data with batch requests and then the values of the
+        spreadsheets (of the URL ``#gid=`` worksheet or all) in threads.
+        """
+        wanted = {}
+        for id_or_url in ids_or_urls:
+            if '/' in id_or_url:
+                url = urls.SheetUrl.from_string(id_or_url, default_gid=None)
+                wanted[url.id] = None if url.gid is None else [url.gid]
+            else:
+                wanted[id_or_url] = None
+        import concurrent.futures
+
+        with tracing.span('gsheets.get_many', spreadsheets=len(wanted)):
+            results = backend.spreadsheets(self._sheets, wanted, batch_size=batch_size)
+
+            kwargs = {'fill_value': fill_value, 'intern_strings': intern_strings,
+                      'value_render_option': value_render_option,
+                      'date_time_render_option': date_time_render_option}
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix='gsheets') as executor:
+                futures = {id: tools.submit(executor, self._from_response_threaded,
+                                            response, sheets=wanted[id], **kwargs)
+                           for id, response in results.items()
+                           if not isinstance(response, Exception)}
+        for id, f in futures.items():
+            exception = f.exception()
+            results[id] = f.result() if exception is None else exception
+        return results
 
     def find(self, title):
         """Fetch and return the first spreadsheet with the given title.
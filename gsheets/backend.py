@@ -1,14 +1,22 @@
 """Thin wrappers around google-api-client-python talking to sheets/drive API."""
 
 from collections.abc import Iterator
+import itertools
+import json
 import re
+import urllib.parse
+import weakref
 
-import apiclient
+from . import profiling
+from . import tracing
 
 __all__ = ['build_service',
+           'execute',
            'iterfiles',
            'spreadsheet',
-           'values'
+           'spreadsheets',
+           'values',
+           'query',
            'quote']
 
 SERVICES = {'sheets': {'serviceName': 'sheets', 'version': 'v4'},
@@ -18,12 +26,40 @@ SHEET = 'application/vnd.google-apps.spreadsheet'
 
 FILEORDER = 'folder,name,createdTime'
 
+VALUE_RENDER_OPTION = 'UNFORMATTED_VALUE'
+
+DATE_TIME_RENDER_OPTION = 'FORMATTED_STRING'
+
+BATCH_SIZE = 100
+
+QUERY_URL = 'https://docs.google.com/spreadsheets/d/{id}/gviz/tq'
+
+QUERY_RESPONSE = re.compile(r'setResponse\((?P<json>.*)\)\s*;?\s*$', flags=re.DOTALL)
+
+QUERY_FORMATTED = {'date', 'datetime', 'timeofday'}
+
+METRICS = weakref.WeakKeyDictionary()
+
 IS_ALPHANUMERIC_A1 = re.compile(r'[a-zA-Z]{1,3}'  # last column 'ZZZ' (18_278)
                                 r'\d{1,}').fullmatch
 
 
-def build_service(name=None, **kwargs):
-    """Return a service endpoint for interacting with a Google API."""
+def __getattr__(name):
+    """Import ``apiclient`` on first access (fast ``import gsheets``)."""
+    if name == 'apiclient':
+        import apiclient.discovery
+        import apiclient.errors
+
+        return apiclient
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def build_service(name=None, *, metrics=None, **kwargs):
+    """Return a service endpoint for interacting with a Google API.
+
+    Record the requests made with the service endpoint in ``metrics``
+    (``gsheets.metrics.Metrics`` instance) if given.
+    """
     if name is not None:
         for kw, value in SERVICES[name].items():
             kwargs.setdefault(kw, value)
@@ -37,7 +73,93 @@ def build_service(name=None, **kwargs):
             if o2c_version == '4' or o2c_version.startswith('4.'):
                 kwargs['cache_discovery'] = False
 
-    return apiclient.discovery.build(**kwargs)
+    with profiling.phase('discovery'):
+        import apiclient.discovery
+
+        service = apiclient.discovery.build(**kwargs)
+    if metrics is not None:
+        METRICS[service] = metrics
+    return service
+
+
+def execute(service, request, operation: str, **attrs):
+    """Return ``request.execute()`` recording it as ``operation`` in the service metrics.
+
+    Args:
+        service: endpoint the ``request`` was created from
+        request: ``googleapiclient.http.HttpRequest`` instance
+        operation (str): API method (e.g. ``'spreadsheets.get'``)
+        **attrs: request details for the ``RequestEvent`` (e.g. ``spreadsheet_id``)
+    """
+    with (profiling.phase(f'request {operation}'),
+          tracing.span(f'gsheets.{operation}', **attrs)):
+        if profiling.active() and _is_http_request(request):
+            request.postproc = profiling.timed('json', request.postproc)
+        return _execute(service, request, operation, attrs)
+
+
+def _execute(service, request, operation: str, attrs):
+    metrics = METRICS.get(service)
+    if metrics is None:
+        return request.execute()
+    with metrics.measure(operation, **attrs) as event:
+        if _is_http_request(request):
+            http = CountingHttp(request.http, event)
+            response = request.execute(http=http, num_retries=metrics.num_retries)
+        else:
+            response = request.execute()
+            event.status = 200  # raises HttpError otherwise
+        event.cells = count_cells(response)
+    return response
+
+
+def http_request(service, uri: str, operation: str, **attrs):
+    """Return ``(resp, content)`` of GET ``uri`` with the service HTTP connection."""
+    with (profiling.phase(f'request {operation}'),
+          tracing.span(f'gsheets.{operation}', **attrs)):
+        metrics = METRICS.get(service)
+        if metrics is None:
+            return service._http.request(uri, 'GET')
+        with metrics.measure(operation, **attrs) as event:
+            return CountingHttp(service._http, event).request(uri, 'GET')
+
+
+def _is_http_request(request) -> bool:
+    from googleapiclient.http import HttpRequest
+
+    return isinstance(request, HttpRequest)
+
+
+class CountingHttp:
+    """Proxy for an ``httplib2.Http`` instance recording responses into ``event``."""
+
+    def __init__(self, http, event) -> None:
+        self._http = http
+        self._event = event
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+    def request(self, *args, **kwargs):
+        resp, content = self._http.request(*args, **kwargs)
+        event = self._event
+        event.attempts += 1
+        event.status = resp.status
+        event.bytes += len(content or b'')
+        return resp, content
+
+
+def count_cells(response) -> int:
+    """Return the number of cell values in a ``values`` API ``response``.
+
+    >>> count_cells({'valueRanges': [{'values': [[1, 2], [3]]},
+    ...                              {'valueRange': {'values': [[4]]}}, {}]})
+    4
+    """
+    if not isinstance(response, dict) or 'valueRanges' not in response:
+        return 0
+    return sum(len(row) for vr in response['valueRanges']
+               for row in vr.get('valueRange', vr).get('values', ()))
 
 
 def iterfiles(service, *,
@@ -54,9 +176,9 @@ def iterfiles(service, *,
     if q:
         params['q'] = ' and '.join(q)
 
-    while True:
+    for page in itertools.count():
         request = service.files().list(**params)
-        response = request.execute()
+        response = execute(service, request, 'files.list', page=page)
         for f in response['files']:
             yield f['id'], f['name']
         try:
@@ -67,10 +189,12 @@ def iterfiles(service, *,
 
 def spreadsheet(service, id):
     """Fetch and return spreadsheet meta data with Google sheets API."""
+    from apiclient.errors import HttpError
+
     request = service.spreadsheets().get(spreadsheetId=id)
     try:
-        response = request.execute()
-    except apiclient.errors.HttpError as e:
+        response = execute(service, request, 'spreadsheets.get', spreadsheet_id=id)
+    except HttpError as e:
         if e.resp.status == 404:
             raise KeyError(id)
         else:  # pragma: no cover
@@ -78,18 +202,132 @@ def spreadsheet(service, id):
     return response
 
 
-def values(service, id, ranges):
-    """Fetch and return spreadsheet cell values with Google sheets API."""
+def spreadsheets(service, ids, *, batch_size: int = BATCH_SIZE) -> dict:
+    """Fetch spreadsheet meta data for ``ids`` with batch requests.
+
+    Return a dict mapping each id to its response or to the exception raised
+    for it (``KeyError`` if not found).
+
+    see https://googleapis.github.io/google-api-python-client/docs/batch.html
+    """
+    from apiclient.errors import HttpError
+
+    ids = list(dict.fromkeys(ids))
+    results = {}
+
+    def callback(request_id, response, exception):
+        if isinstance(exception, HttpError) and exception.resp.status == 404:
+            exception = KeyError(request_id)
+        results[request_id] = response if exception is None else exception
+
+    for start in range(0, len(ids), batch_size):
+        batch = service.new_batch_http_request(callback=callback)
+        batch_ids = ids[start:start + batch_size]
+        for id in batch_ids:
+            batch.add(service.spreadsheets().get(spreadsheetId=id), request_id=id)
+        execute(service, batch, 'batch', requests=len(batch_ids))
+    return {id: results[id] for id in ids}
+
+
+def values(service, id, ranges=None, *, data_filters=None,
+           value_render_option=VALUE_RENDER_OPTION,
+           date_time_render_option=DATE_TIME_RENDER_OPTION):
+    """Fetch and return spreadsheet cell values with Google sheets API.
+
+    Fetch the given A1 notation ``ranges`` or the ranges matching
+    ``data_filters`` (e.g. ``[{'developerMetadataLookup': {'metadataKey': 'spam'}}]``).
+
+    see https://developers.google.com/sheets/api/reference/rest/v4/DataFilter
+    see https://developers.google.com/sheets/api/reference/rest/v4/ValueRenderOption
+    see https://developers.google.com/sheets/api/reference/rest/v4/DateTimeRenderOption
+    """
     params = {'majorDimension': 'ROWS',
-              'valueRenderOption': 'UNFORMATTED_VALUE',
-              'dateTimeRenderOption': 'FORMATTED_STRING',
-              'spreadsheetId': id,
-              'ranges': ranges}
+              'valueRenderOption': value_render_option,
+              'dateTimeRenderOption': date_time_render_option}
+    if data_filters is not None:
+        body = dict(params, dataFilters=data_filters)
+        request = (service.spreadsheets().values()
+                   .batchGetByDataFilter(spreadsheetId=id, body=body))
+        response = execute(service, request, 'values.batchGetByDataFilter',
+                           spreadsheet_id=id, filters=len(data_filters))
+        return [r['valueRange'] for r in response.get('valueRanges', [])]
+    params.update(spreadsheetId=id, ranges=ranges)
     request = service.spreadsheets().values().batchGet(**params)
-    response = request.execute()
+    response = execute(service, request, 'values.batchGet',
+                       spreadsheet_id=id, ranges=len(ranges or ()))
     return response['valueRanges']
 
 
+def query(service, id, gid: int, tq: str, *,
+          headers: int | None = None, fill_value=None) -> list[list]:
+    """Fetch and return the rows matching ``tq`` from the visualization query endpoint.
+
+    see https://developers.google.com/chart/interactive/docs/querylanguage
+    """
+    params = {'tqx': 'out:json', 'gid': gid, 'tq': tq}
+    if headers is not None:
+        params['headers'] = headers
+    uri = f'{QUERY_URL.format(id=id)}?{urllib.parse.urlencode(params)}'
+    resp, content = http_request(service, uri, 'gviz.query', spreadsheet_id=id, gid=gid)
+    if resp.status == 404:
+        raise KeyError(id)
+    elif resp.status != 200:
+        from apiclient.errors import HttpError
+
+        raise HttpError(resp, content, uri=uri)
+    with profiling.phase('json'):
+        response = parse_query_response(content.decode('utf-8'))
+    if response['status'] == 'error':
+        messages = (e.get('detailed_message', e.get('message', e['reason']))
+                    for e in response['errors'])
+        raise ValueError('; '.join(messages))
+    return query_rows(response['table'], fill_value=fill_value)
+
+
+def parse_query_response(text: str):
+    """Return the JSON payload from a visualization query JSONP response.
+
+    >>> parse_query_response('/*O_o*/\\ngoogle.visualization.Query.setResponse({"status":"ok"});')
+    {'status': 'ok'}
+    """
+    ma = QUERY_RESPONSE.search(text)
+    if ma is None:
+        raise ValueError(f'invalid query response: {text[:100]!r}')
+    return json.loads(ma.group('json'))
+
+
+def query_rows(table, *, fill_value=None) -> list[list]:
+    """Return row-major cell values from a visualization query response ``table``.
+
+    >>> query_rows({'cols': [{'type': 'number'}, {'type': 'date'}, {'type': 'string'}],
+    ...             'rows': [{'c': [{'v': 1.0}, {'v': 'Date(2020,0,1)', 'f': '1/1/2020'}, None]},
+    ...                      {'c': [{'v': 1.5}, None, {'v': 'spam'}]}]})
+    [[1, '1/1/2020', None], [1.5, None, 'spam']]
+    """
+    converters = []
+    for c in table['cols']:
+        if c['type'] in QUERY_FORMATTED:
+            converters.append(lambda cell: cell.get('f', cell['v']))
+        elif c['type'] == 'number':
+            converters.append(_query_number)
+        else:
+            converters.append(lambda cell: cell['v'])
+
+    def iterrows(rows):
+        for r in rows:
+            yield [fill_value if cell is None or cell.get('v') is None else conv(cell)
+                   for conv, cell in zip(converters, r['c'])]
+
+    return list(iterrows(table['rows']))
+
+
+def _query_number(cell):
+    value = cell['v']
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
 def quote(worksheet_name: str) -> str:
     """Return ``worksheet_name``, single-quote if needed.
 
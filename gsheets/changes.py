@@ -0,0 +1,220 @@
+"""Cell-level differences between spreadsheets and worksheets."""
+
+import difflib
+import itertools
+
+from .coordinates import base26
+
+__all__ = ['diff', 'SpreadSheetDiff', 'WorkSheetDiff']
+
+
+def diff(old, new):
+    """Return the differences between two spreadsheets or two worksheets.
+
+    Args:
+        old: SpreadSheet or WorkSheet instance
+        new: SpreadSheet or WorkSheet instance (same type as ``old``)
+    Returns:
+        SpreadSheetDiff or WorkSheetDiff instance
+    Raises:
+        TypeError: if ``old`` and ``new`` are not both spreadsheets or worksheets
+
+    >>> from gsheets.models import SpreadSheet, WorkSheet
+    >>> old = SpreadSheet('spam', 'Spam', [WorkSheet(0, 'Spam1', 0, [[1, 2], [3, 4]]),
+    ...                                    WorkSheet(1, 'Spam2', 1, [[5]])], None)
+    >>> new = SpreadSheet('spam', 'Spam', [WorkSheet(0, 'Eggs1', 0, [[0, 1, 2], [3, 4]]),
+    ...                                    WorkSheet(2, 'Eggs2', 1, [[6]])], None)
+
+    >>> d = diff(old, new)
+    >>> d  # doctest: +NORMALIZE_WHITESPACE
+    <SpreadSheetDiff added=['Eggs2'] removed=['Spam2']
+                     renamed=[('Spam1', 'Eggs1')] changed=['Eggs1']>
+
+    >>> d['Eggs1']
+    <WorkSheetDiff 'Eggs1' inserted=[] deleted=[] changed=['A1:C1']>
+    """
+    from .models import SpreadSheet, WorkSheet
+
+    if isinstance(old, SpreadSheet) and isinstance(new, SpreadSheet):
+        return SpreadSheetDiff(old, new)
+    elif isinstance(old, WorkSheet) and isinstance(new, WorkSheet):
+        return WorkSheetDiff(old, new)
+    raise TypeError(f'need two spreadsheets or two worksheets: {old!r}, {new!r}')
+
+
+class SpreadSheetDiff:
+    """Added, removed, renamed, and changed worksheets (matched by their ids)."""
+
+    def __init__(self, old, new) -> None:
+        old_sheets = {s.id: s for s in old}
+        new_sheets = {s.id: s for s in new}
+
+        self.old = old
+        self.new = new
+        #: worksheets only in ``new``
+        self.added = [s for s in new if s.id not in old_sheets]
+        #: worksheets only in ``old``
+        self.removed = [s for s in old if s.id not in new_sheets]
+        #: ``(old_title, new_title)`` pairs
+        self.renamed = []
+        #: WorkSheetDiff instances of the changed worksheets in ``new``
+        self.changed = []
+        for s in new:
+            o = old_sheets.get(s.id)
+            if o is None:
+                continue
+            if o.title != s.title:
+                self.renamed.append((o.title, s.title))
+            d = WorkSheetDiff(o, s)
+            if d:
+                self.changed.append(d)
+
+    def __repr__(self) -> str:
+        return (f'<{self.__class__.__name__}'
+                f' added={[s.title for s in self.added]!r}'
+                f' removed={[s.title for s in self.removed]!r}'
+                f' renamed={self.renamed!r}'
+                f' changed={[d.new.title for d in self.changed]!r}>')
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.renamed or self.changed)
+
+    def __getitem__(self, title: str):
+        """Return the WorkSheetDiff of the changed worksheet with the given (new) title.
+
+        Raises:
+            KeyError: if there is no changed worksheet with ``title``
+        """
+        for d in self.changed:
+            if d.new.title == title:
+                return d
+        raise KeyError(title)
+
+
+class WorkSheetDiff:
+    """Inserted, deleted, and changed rows and cells of two worksheets.
+
+    Matches unchanged rows by their ``row_digests`` so that inserting or
+    deleting rows does not report all rows below as changed.
+
+    >>> from gsheets.models import WorkSheet
+    >>> old = WorkSheet(0, 'Spam', 0, [['a', 'b', 'c'], [1, 2, 3], [4, 5, 6], [7, 8, 9]])
+    >>> new = WorkSheet(0, 'Spam', 0, [['a', 'b', 'c'], [0, 0, 0], [1, 2, 3],
+    ...                                [4, 0, 0], [7, 0, 0]])
+
+    >>> d = WorkSheetDiff(old, new)
+    >>> d
+    <WorkSheetDiff 'Spam' inserted=['2:2'] deleted=[] changed=['B4:C5']>
+
+    >>> list(d.cells())  # doctest: +NORMALIZE_WHITESPACE
+    [('B4', 5, 0), ('C4', 6, 0), ('B5', 8, 0), ('C5', 9, 0)]
+    """
+
+    def __init__(self, old, new) -> None:
+        self.old = old
+        self.new = new
+        #: row ranges (A1 notation of ``new``) only in ``new``
+        self.inserted = []
+        #: row ranges (A1 notation of ``old``) only in ``old``
+        self.deleted = []
+        #: ``(old_row, new_row, cols)`` triples for replaced rows
+        self._rows = []
+
+        if old.digest == new.digest:
+            self.changed = []
+            return
+
+        a, b = old.row_digests, new.row_digests
+        matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            n = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+            for i, j in zip(range(i1, i1 + n), range(j1, j1 + n)):
+                cols = changed_cols(old._values[i], new._values[j],
+                                    old.fill_value, new.fill_value)
+                if cols:
+                    self._rows.append((i, j, cols))
+            if i1 + n < i2:
+                self.deleted.append(row_range(i1 + n, i2))
+            if j1 + n < j2:
+                self.inserted.append(row_range(j1 + n, j2))
+
+        #: rectangular cell ranges (A1 notation of ``new``) with changed values
+        self.changed = cell_ranges((j, cols) for _, j, cols in self._rows)
+
+    def __repr__(self) -> str:
+        return (f'<{self.__class__.__name__} {self.new.title!r}'
+                f' inserted={self.inserted!r}'
+                f' deleted={self.deleted!r}'
+                f' changed={self.changed!r}>')
+
+    def __bool__(self) -> bool:
+        return bool(self.inserted or self.deleted or self._rows)
+
+    def cells(self):
+        """Yield ``(coord, old_value, new_value)`` triples for all changed cells.
+
+        Missing cells of narrower worksheets are reported as their ``fill_value``.
+        """
+        old, new = self.old, self.new
+        for i, j, cols in self._rows:
+            a, b = old._values[i], new._values[j]
+            for c in cols:
+                yield (f'{base26(c + 1)}{j + 1:d}',
+                       a[c] if c < len(a) else old.fill_value,
+                       b[c] if c < len(b) else new.fill_value)
+
+
+def changed_cols(a, b, a_fill, b_fill) -> list[int]:
+    """Return the indexes of the differing values in rows ``a`` and ``b``.
+
+    >>> changed_cols((1, 2, 3), (1, 0), '', '')
+    [1, 2]
+    """
+    return [c for c, (x, y) in enumerate(itertools.zip_longest(a, b))
+            if (a_fill if c >= len(a) else x) != (b_fill if c >= len(b) else y)]
+
+
+def row_range(start: int, stop: int) -> str:
+    """Return A1 notation for the rows from ``start`` to ``stop`` (zero-based, exclusive).
+
+    >>> row_range(0, 1), row_range(2, 5)
+    ('1:1', '3:5')
+    """
+    return f'{start + 1:d}:{stop:d}'
+
+
+def cell_ranges(rows) -> list[str]:
+    """Return A1 notation for rectangles covering the ``(row, cols)`` pairs.
+
+    Merges runs of consecutive columns with runs in the same columns of the rows
+    directly above.
+
+    >>> cell_ranges([(0, [0, 1]), (1, [0, 1, 3]), (2, [3]), (4, [3])])
+    ['A1:B2', 'D2:D3', 'D5']
+    """
+    done, open_ = [], {}
+    for row, cols in rows:
+        current = {}
+        for _, run in itertools.groupby(enumerate(cols), lambda x: x[1] - x[0]):
+            run = [c for _, c in run]
+            key = (run[0], run[-1])
+            start = row
+            above = open_.pop(key, None)
+            if above is not None and above[1] == row - 1:
+                start = above[0]
+            elif above is not None:
+                done.append((key, above))
+            current[key] = (start, row)
+        done += open_.items()
+        open_ = current
+    done += open_.items()
+    return [cell_range(c1, c2, r1, r2)
+            for (c1, c2), (r1, r2) in sorted(done, key=lambda x: (x[1][0], x[0]))]
+
+
+def cell_range(col_start: int, col_stop: int, row_start: int, row_stop: int) -> str:
+    start = f'{base26(col_start + 1)}{row_start + 1:d}'
+    stop = f'{base26(col_stop + 1)}{row_stop + 1:d}'
+    return start if start == stop else f'{start}:{stop}'
@@ -1,9 +1,45 @@
 """Return cell values and slices from sheet coordinate strings."""
 
+import functools
 import re
 import string
 
-__all__ = ['Coordinates']
+from . import tools
+
+__all__ = ['Coordinates', 'compile']
+
+CACHE_SIZE = 1_024
+
+ALL = slice(None)
+
+
+def compile(coord):
+    """Return a reusable callable fetching value(s) for ``coord`` from row-major cells.
+
+    >>> get_b2 = compile('B2')
+    >>> get_b2([[1, 2], [3, 4]]), get_b2([[5, 6], [7, 8]])
+    (4, 8)
+
+    >>> get_b2.source
+    'lambda x: x[1][1]'
+
+    >>> compile('B2') is get_b2
+    True
+
+    >>> compile(slice('A2', None))([[1, 2], [3, 4]])
+    [[3, 4]]
+    """
+    return _generate(Coordinates.from_string(coord))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _generate(getter):
+    """Return code-generated function for simple ``getter`` or ``getter`` itself."""
+    try:
+        template = SOURCES[type(getter)]
+    except KeyError:
+        return getter
+    return tools.eval_source(template.format(getter))
 
 
 def base26int(s: str,
@@ -45,6 +81,42 @@ def base26(x: int,
     return ''.join(digits[::-1])
 
 
+_sheet_prefix = re.compile(r"\s*(?:'(?P<quoted>(?:[^']|'')+)'|(?P<name>[^'!\s][^'!]*))!").match
+
+
+def sheet_name(coord: str) -> str | None:
+    """Return the (unquoted) sheet name prefix of ``coord`` or ``None``.
+
+    >>> sheet_name('Spam!A1'), sheet_name("'Spam eggs''s'!A1"), sheet_name('A1')
+    ('Spam', "Spam eggs's", None)
+    """
+    ma = _sheet_prefix(coord)
+    if ma is None:
+        return None
+    elif ma['quoted'] is not None:
+        return ma['quoted'].replace("''", "'")
+    return ma['name']
+
+
+def check_sheet(coord, title: str) -> None:
+    """Raise ``ValueError`` if ``coord`` has a sheet prefix other than ``title``.
+
+    >>> check_sheet('A1', 'Spam'), check_sheet(slice("'Spam'!A1", 'Spam!B2'), 'Spam')
+    (None, None)
+
+    >>> check_sheet(slice('A1', 'Eggs!B2'), 'Spam')
+    Traceback (most recent call last):
+        ...
+    ValueError: 'Eggs!B2' refers to sheet 'Eggs', not 'Spam'
+    """
+    keys = (coord.start, coord.stop) if isinstance(coord, slice) else (coord,)
+    for k in keys:
+        if isinstance(k, str) and '!' in k:
+            name = sheet_name(k)
+            if name is not None and name != title:
+                raise ValueError(f'{k!r} refers to sheet {name!r}, not {title!r}')
+
+
 class Cells:
     """Row-major cell collection for doctests.
 
@@ -80,13 +152,17 @@ class Coordinates:
     TypeError: ...
     """
 
+    __slots__ = ('col', 'row')
+
     _regex = re.compile(r'(?i)'
-                        r'\s*(?:'
-                        r'(?:(?P<xcol>[A-Z])(?P<xrow>[1-9][0-9]*))'
+                        r'\s*'
+                        r"(?:(?:'(?:[^']|'')+'|[^'!\s][^'!]*)!)?"  # Sheet!
+                        r'(?:'
+                        r'(?:\$?(?P<xcol>[A-Z]{1,3})\$?(?P<xrow>[1-9][0-9]*))'
                         r'|'
-                        r'(?P<col>[A-Z])'
+                        r'\$?(?P<col>[A-Z]{1,3})'  # last column 'ZZZ' (18_278)
                         r'|'
-                        r'(?P<row>[1-9][0-9]*)'
+                        r'\$?(?P<row>[1-9][0-9]*)'
                         r')\s*$')
 
     @staticmethod
@@ -99,6 +175,12 @@ class Coordinates:
         >>> Coordinates._parse('A'), Coordinates._parse('1')
         ((None, None, 'A', None), (None, None, None, '1'))
 
+        >>> Coordinates._parse('$AB$12'), Coordinates._parse('ZZZ')
+        (('AB', '12', None, None), (None, None, 'ZZZ', None))
+
+        >>> Coordinates._parse("Spam!C3"), Coordinates._parse("'Spam eggs''s'!C3")
+        (('C', '3', None, None), ('C', '3', None, None))
+
         >>> Coordinates._parse('spam')
         Traceback (most recent call last):
             ...
@@ -110,21 +192,26 @@ class Coordinates:
             raise ValueError(coord)
 
     @staticmethod
-    def _cint(col, *, _map={base26(i): i - 1 for i in range(1, 257)}):
+    def _cint(col):
         """Return zero-based column index from bijective base26 string.
 
         >>> Coordinates._cint('Ab')
         27
 
+        >>> Coordinates._cint('A'), Coordinates._cint('ZZZ')
+        (0, 18277)
+
         >>> Coordinates._cint('spam')
         Traceback (most recent call last):
             ...
         ValueError: spam
         """
-        try:
-            return _map[col.upper()]
-        except KeyError:
+        if not (0 < len(col) <= 3 and col.isascii() and col.isalpha()):
             raise ValueError(col)
+        result = 0
+        for c in col:
+            result = result * 26 + (ord(c) & 0x1F)  # 'A' and 'a' -> 1
+        return result - 1
 
     @staticmethod
     def _rint(row, *, _int=int):
@@ -132,8 +219,21 @@ class Coordinates:
 
     @classmethod
     def from_string(cls, coord):
+        """Return the (cached) value fetching callable for ``coord``.
+
+        >>> Coordinates.from_string('A1') is Coordinates.from_string('A1')
+        True
+
+        >>> Coordinates.from_string(slice('A', 'B')) is Coordinates.from_string(slice('A', 'B'))
+        True
+        """
         if isinstance(coord, slice):
-            return Slice.from_slice(coord)
+            # slice objects are unhashable before Python 3.12
+            return _cached_from_slice(coord.start, coord.stop, coord.step)
+        return _cached_from_string(coord)
+
+    @classmethod
+    def _from_string(cls, coord):
         xcol, xrow, col, row = cls._parse(coord)
         if xcol is not None:
             return Cell(cls._cint(xcol), cls._rint(xrow))
@@ -141,20 +241,46 @@ class Coordinates:
             return Col(cls._cint(col))
         return Row(cls._rint(row))
 
+    def window(self):
+        """Return ``(row, col)`` pair of ``int`` (single) or ``slice`` (range).
+
+        >>> Coordinates.from_string('B2').window()
+        (1, 1)
+
+        >>> Coordinates.from_string(slice('B2', None)).window()
+        (slice(1, None, None), slice(1, None, None))
+        """
+        return getattr(self, 'row', ALL), getattr(self, 'col', ALL)
+
     def __repr__(self) -> str:
-        items = sorted((k, v) for k, v in self.__dict__.items()
-                       if not k.startswith('_'))
+        items = ((k, getattr(self, k)) for k in Coordinates.__slots__
+                 if hasattr(self, k))
         args = ', '.join(f'{k}={v!r}' for k, v in items)
         return f'<{self.__class__.__name__}({args})>'
 
 
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _cached_from_string(coord):
+    return Coordinates._from_string(coord)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _cached_from_slice(start, stop, step):
+    return Slice.from_slice(slice(start, stop, step))
+
+
 class Cell(Coordinates):
     """
 
     >>> Cells()['B2']
     (<Cell(col=1, row=1)>, 5)
+
+    >>> Cells()['$C$3'], Cells()["'Spam'!C3"]
+    ((<Cell(col=2, row=2)>, 9), (<Cell(col=2, row=2)>, 9))
     """
 
+    __slots__ = ()
+
     def __init__(self, col: int, row: int) -> None:
         self.col = col
         self.row = row
@@ -169,6 +295,9 @@ class Col(Coordinates):
     >>> Cells()['B']
     (<Col(col=1)>, [2, 5, 8])
     """
+
+    __slots__ = ()
+
     def __init__(self, col: int) -> None:
         self.col = col
 
@@ -184,6 +313,8 @@ class Row(Coordinates):
     (<Row(row=1)>, [4, 5, 6])
     """
 
+    __slots__ = ()
+
     def __init__(self, row: int) -> None:
         self.row = row
 
@@ -203,6 +334,8 @@ class Slice(Coordinates):
     NotImplementedError: no slice step support
     """
 
+    __slots__ = ()
+
     @classmethod
     def from_slice(cls, coord):
         """Return a value fetching callable given a slice of coordinate strings."""
@@ -237,6 +370,11 @@ class StartCell(Cell, Slice):
     (<StartCell(col=1, row=1)>, [[5, 6], [8, 9]])
     """
 
+    __slots__ = ()
+
+    def window(self):
+        return slice(self.row, None), slice(self.col, None)
+
     def __call__(self, x):
         col = self.col
         return [r[col:] for r in x[self.row:]]
@@ -249,6 +387,11 @@ class StopCell(Cell, Slice):
     (<StopCell(col=2, row=2)>, [[1, 2], [4, 5]])
     """
 
+    __slots__ = ()
+
+    def window(self):
+        return slice(None, self.row), slice(None, self.col)
+
     def __call__(self, x):
         col = self.col
         return [r[:col] for r in x[:self.row]]
@@ -261,6 +404,11 @@ class StartCol(Col, Slice):
     (<StartCol(col=1)>, [[2, 3], [5, 6], [8, 9]])
     """
 
+    __slots__ = ()
+
+    def window(self):
+        return ALL, slice(self.col, None)
+
     def __call__(self, x):
         col = self.col
         return [r[col:] for r in x]
@@ -273,6 +421,11 @@ class StopCol(Col, Slice):
     (<StopCol(col=2)>, [[1, 2], [4, 5], [7, 8]])
     """
 
+    __slots__ = ()
+
+    def window(self):
+        return ALL, slice(None, self.col)
+
     def __call__(self, x):
         col = self.col
         return [r[:col] for r in x]
@@ -285,6 +438,11 @@ class StartRow(Row, Slice):
     (<StartRow(row=1)>, [[4, 5, 6], [7, 8, 9]])
     """
 
+    __slots__ = ()
+
+    def window(self):
+        return slice(self.row, None), ALL
+
     def __call__(self, x):
         return x[self.row:]
 
@@ -296,12 +454,19 @@ class StopRow(Row, Slice):
     (<StopRow(row=2)>, [[1, 2, 3], [4, 5, 6]])
     """
 
+    __slots__ = ()
+
+    def window(self):
+        return slice(None, self.row), ALL
+
     def __call__(self, x):
         return x[:self.row]
 
 
 class DoubleSlice(Slice):
 
+    __slots__ = ()
+
     @classmethod
     def from_slice(cls, coord):
         sxcol, sxrow, scol, srow = cls._parse(coord.start)
@@ -369,6 +534,11 @@ class DoubleSlice(Slice):
 
 class Empty(DoubleSlice):
 
+    __slots__ = ()
+
+    def window(self):
+        return slice(0, 0), slice(0, 0)
+
     def __call__(self, x):
         return []
 
@@ -392,6 +562,8 @@ class StartCellStopCell(DoubleSlice):
     (<Empty()>, [])
     """
 
+    __slots__ = ()
+
     def __init__(self, start_col, start_row, stop_col, stop_row) -> None:
         self.col = slice(start_col, stop_col)
         self.row = slice(start_row, stop_row)
@@ -410,6 +582,8 @@ class StartCellStopCol(Cell, DoubleSlice):
     (<Empty()>, [])
     """
 
+    __slots__ = ()
+
     def __init__(self, start_col, start_row, stop_col) -> None:
         self.col = slice(start_col, stop_col)
         self.row = start_row
@@ -427,6 +601,9 @@ class StartCellStopRow(DoubleSlice):
     >>> Cells()['B3':'1']
     (<Empty()>, [])
     """
+
+    __slots__ = ()
+
     def __init__(self, start_col, start_row, stop_row) -> None:
         self.col = start_col
         self.row = slice(start_row, stop_row)
@@ -445,6 +622,8 @@ class StartColStopCell(Cell, DoubleSlice):
     (<Empty()>, [])
     """
 
+    __slots__ = ()
+
     def __init__(self, start_col, stop_col, stop_row) -> None:
         self.col = slice(start_col, stop_col)
         self.row = stop_row
@@ -462,6 +641,9 @@ class StartRowStopCell(DoubleSlice):
     >>> Cells()['3':'A1']
     (<Empty()>, [])
     """
+
+    __slots__ = ()
+
     def __init__(self, start_row, stop_col, stop_row) -> None:
         self.col = stop_col
         self.row = slice(start_row, stop_row)
@@ -480,6 +662,8 @@ class StartColStopCol(Col, DoubleSlice):
     (<Empty()>, [])
     """
 
+    __slots__ = ()
+
     def __init__(self, start_col, stop_col) -> None:
         self.col = slice(start_col, stop_col)
 
@@ -497,6 +681,8 @@ class StartRowStopRow(DoubleSlice):
     (<Empty()>, [])
     """
 
+    __slots__ = ()
+
     def __init__(self, start_row, stop_row) -> None:
         self.row = slice(start_row, stop_row)
 
@@ -511,6 +697,8 @@ class StartColStopRow(DoubleSlice):
     (<StartColStopRow(col=0, row=slice(None, 3, None))>, [1, 4, 7])
     """
 
+    __slots__ = ()
+
     def __init__(self, start_col, stop_row) -> None:
         self.col = start_col
         self.row = slice(None, stop_row)
@@ -523,6 +711,13 @@ class StartRowStopCol(Cell, DoubleSlice):
     (<StartRowStopCol(col=slice(None, 3, None), row=0)>, [1, 2, 3])
     """
 
+    __slots__ = ()
+
     def __init__(self, start_row, stop_col) -> None:
         self.col = slice(None, stop_col)
         self.row = start_row
+
+
+SOURCES = {Cell: 'lambda x: x[{0.row:d}][{0.col:d}]',
+           Col: 'lambda x: [r[{0.col:d}] for r in x]',
+           Row: 'lambda x: x[{0.row:d}][:]'}
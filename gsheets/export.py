@@ -1,11 +1,18 @@
 """Dump spreadsheet values to CSV files and pandas DataFrames."""
 
 import csv
+import contextlib
+import datetime
 import io
+import itertools
+
+from . import coordinates
+from . import profiling
+from . import tracing
 
 pandas = None
 
-__all__ = ['ENCODING', 'write_csv', 'write_dataframe']
+__all__ = ['ENCODING', 'write_csv', 'write_dataframe', 'write_sqlite']
 
 ENCODING = 'utf-8'
 
@@ -13,25 +20,235 @@ DIALECT = 'excel'
 
 MAKE_FILENAME = '%(title)s - %(sheet)s.csv'
 
+IF_EXISTS = ('fail', 'replace', 'append')
+
+INFER_ROWS = 100
+
+BATCH_SIZE = 10_000
+
+SERIAL_EPOCH = datetime.datetime(1899, 12, 30)
+
 
 def write_csv(fileobj, /, rows, *,
               dialect: csv.Dialect | type[csv.Dialect] | str = DIALECT) -> None:
     """Dump rows to ``fileobj`` with the given CSV ``dialect``."""
-    csvwriter = csv.writer(fileobj, dialect=dialect)
-    csvwriter.writerows(rows)
+    with profiling.phase('export csv'), tracing.span('gsheets.export.csv'):
+        csvwriter = csv.writer(fileobj, dialect=dialect)
+        csvwriter.writerows(rows)
 
 
 def write_dataframe(rows, /, *,
                     dialect: csv.Dialect | type[csv.Dialect] | str = DIALECT,
+                    dates=None,
                     **kwargs):
-    """Dump ``rows`` to string buffer and load with ``pandas.read_csv()`` using ``kwargs``."""
+    """Dump ``rows`` to string buffer and load with ``pandas.read_csv()`` using ``kwargs``.
+
+    Convert ``dates`` columns from serial day numbers to ``datetime64``.
+    """
     global pandas
     if pandas is None:  # pragma: no cover
         import pandas
 
-    with io.StringIO() as fd:
+    with (profiling.phase('export dataframe'),
+          tracing.span('gsheets.export.dataframe'),
+          io.StringIO() as fd):
         write_csv(fd, rows, dialect=dialect)
         fd.seek(0)
         df = pandas.read_csv(fd, dialect=dialect, **kwargs)
 
+        for col in dates or ():
+            df[col] = pandas.to_datetime(df[col], unit='D',
+                                         origin=pandas.Timestamp(SERIAL_EPOCH))
+
     return df
+
+
+def from_serial(value):
+    """Return serial day number ``value`` as ``datetime.datetime``, pass through others.
+
+    >>> from_serial(44197.5)
+    datetime.datetime(2021, 1, 1, 12, 0)
+
+    >>> from_serial('')
+    ''
+
+    see https://developers.google.com/sheets/api/reference/rest/v4/DateTimeRenderOption
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return SERIAL_EPOCH + datetime.timedelta(days=value)
+    return value
+
+
+def convert_columns(rows, cols, func):
+    """Yield copies of ``rows`` with ``func`` applied to the values of ``cols``.
+
+    >>> list(convert_columns([[1, 2, 3], [4, 5, 6]], [0, 2], str))
+    [['1', 2, '3'], ['4', 5, '6']]
+    """
+    for r in rows:
+        r = r[:]
+        for c in cols:
+            r[c] = func(r[c])
+        yield r
+
+
+def write_sqlite(conn, table: str, /, rows, *,
+                 if_exists: str = 'fail',
+                 header: bool = True,
+                 infer_rows: int = INFER_ROWS,
+                 batch_size: int = BATCH_SIZE) -> int:
+    """Load ``rows`` into sqlite3 ``table`` within one savepoint, return row count.
+
+    ``rows`` can be any iterable of lists (e.g. a generator of row chunks),
+    only the first ``infer_rows`` are held in memory for column type inference.
+    Later rows must not have non-empty cells beyond the columns of the header
+    and the first ``infer_rows`` rows. Empty cells (``''`` and ``None``) are
+    written as ``NULL``.
+
+    Does not commit or roll back work of a transaction already open on ``conn``.
+    """
+    if if_exists not in IF_EXISTS:
+        raise ValueError(f'if_exists must be one of {IF_EXISTS!r}: {if_exists!r}')
+
+    rows = map(nulled, rows)
+    names = next(rows, []) if header else None
+    head = list(itertools.islice(rows, infer_rows))
+    ncols = max(map(len, head), default=0)
+    if names is not None:
+        ncols = max(ncols, len(names))
+    if not ncols:
+        raise ValueError(f'no columns to write into table {table!r}')
+    names = column_names(names, ncols)
+    affinities = infer_affinities(head, ncols)
+
+    name = quote_identifier(table)
+    columns = ', '.join(f'{quote_identifier(n)} {a}'
+                        for n, a in zip(names, affinities))
+    insert = f'INSERT INTO {name} VALUES ({", ".join("?" * ncols)})'
+
+    exists = conn.execute('SELECT 1 FROM sqlite_master'
+                          ' WHERE type = ? AND name = ? COLLATE NOCASE',
+                          ['table', table]).fetchone() is not None
+    if exists and if_exists == 'fail':
+        raise ValueError(f'table {table!r} already exists')
+
+    rows = (padded(r, ncols) for r in itertools.chain(head, rows))
+    count = 0
+    with (profiling.phase('export sqlite'),
+          tracing.span('gsheets.export.sqlite'),
+          savepoint(conn)):
+        if exists and if_exists == 'replace':
+            conn.execute(f'DROP TABLE {name}')
+        if not exists or if_exists == 'replace':
+            conn.execute(f'CREATE TABLE {name} ({columns})')
+        while batch := list(itertools.islice(rows, batch_size)):
+            conn.executemany(insert, batch)
+            count += len(batch)
+    return count
+
+
+@contextlib.contextmanager
+def savepoint(conn, name: str = 'gsheets_export'):
+    """Return a context manager running its block in a savepoint of ``conn``.
+
+    Releases the savepoint on success (committing only if no transaction was
+    open before), rolls back to it on error.
+
+    >>> import sqlite3
+    >>> conn = sqlite3.connect(':memory:')
+    >>> with savepoint(conn):
+    ...     _ = conn.execute('CREATE TABLE spam (eggs)')
+    >>> conn.in_transaction
+    False
+    """
+    conn.execute(f'SAVEPOINT {name}')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute(f'ROLLBACK TO {name}')
+        conn.execute(f'RELEASE {name}')
+        raise
+    else:
+        conn.execute(f'RELEASE {name}')
+
+
+def column_names(header, ncols: int) -> list[str]:
+    """Return ``ncols`` unique column names from ``header`` (default: A1 column letters).
+
+    >>> column_names(['spam', None, 'spam'], 4)
+    ['spam', 'B', 'spam_C', 'D']
+
+    >>> column_names(None, 2)
+    ['A', 'B']
+    """
+    if header is None:
+        header = []
+    result, seen = [], set()
+    for i in range(ncols):
+        letters = coordinates.base26(i + 1)
+        name = header[i] if i < len(header) else None
+        name = letters if name is None or name == '' else str(name)
+        if name in seen:
+            name = f'{name}_{letters}'
+        seen.add(name)
+        result.append(name)
+    return result
+
+
+def infer_affinities(rows, ncols: int) -> list[str]:
+    """Return sqlite3 column affinities for ``ncols`` columns from sample ``rows``.
+
+    >>> infer_affinities([[1, 1.5, 'spam', None], [2, 3, 4]], 4)
+    ['INTEGER', 'REAL', 'TEXT', 'TEXT']
+    """
+    kinds = [set() for _ in range(ncols)]
+    for r in rows:
+        for k, value in zip(kinds, r):
+            if value is not None and value != '':
+                k.add(type(value))
+    return [affinity(k) for k in kinds]
+
+
+def affinity(types) -> str:
+    if types and types <= {bool, int}:
+        return 'INTEGER'
+    elif types and types <= {bool, int, float}:
+        return 'REAL'
+    return 'TEXT'
+
+
+def quote_identifier(name: str) -> str:
+    """Return ``name`` quoted as SQL identifier.
+
+    >>> quote_identifier('sp"am')
+    '"sp""am"'
+    """
+    escaped = name.replace('"', '""')
+    return f'"{escaped}"'
+
+
+def nulled(row):
+    """Return ``row`` with empty string cells replaced by ``None``.
+
+    >>> nulled(['spam', '', 0, 0.0, False, None])
+    ['spam', None, 0, 0.0, False, None]
+    """
+    return [None if v == '' and type(v) is str else v for v in row]
+
+
+def padded(row, ncols: int):
+    """Return ``row`` cut or filled up with ``None`` to exactly ``ncols`` items.
+
+    >>> padded([1, 2], 3), padded([1, None], 1)
+    ([1, 2, None], [1])
+
+    >>> padded([1, 2], 1)
+    Traceback (most recent call last):
+    ...
+    ValueError: row has non-empty cells beyond 1 columns: [1, 2]
+    """
+    if len(row) == ncols:
+        return row
+    if any(v is not None for v in row[ncols:]):
+        raise ValueError(f'row has non-empty cells beyond {ncols} columns: {row!r}')
+    return list(row[:ncols]) + [None] * (ncols - len(row))
@@ -0,0 +1,149 @@
+"""Counters, latencies, and event hooks for API requests."""
+
+import collections
+import contextlib
+import threading
+import time
+
+__all__ = ['Metrics', 'RequestEvent']
+
+FIELDS = ('requests', 'errors', 'retries', 'seconds', 'bytes', 'cells')
+
+PROMETHEUS = [('requests', 'gsheets_requests_total', 'counter',
+               'Number of API requests.'),
+              ('errors', 'gsheets_request_errors_total', 'counter',
+               'Number of failed API requests.'),
+              ('retries', 'gsheets_request_retries_total', 'counter',
+               'Number of retried HTTP requests.'),
+              ('seconds', 'gsheets_request_seconds_total', 'counter',
+               'Total wall time of API requests in seconds.'),
+              ('bytes', 'gsheets_response_bytes_total', 'counter',
+               'Total size of API response bodies in bytes.'),
+              ('cells', 'gsheets_response_cells_total', 'counter',
+               'Total number of returned cell values.')]
+
+
+class RequestEvent:
+    """Operation name, attributes, and (after the response) measurements of a request."""
+
+    __slots__ = ('operation', 'attrs', 'status', 'seconds', 'attempts',
+                 'bytes', 'cells', 'error')
+
+    def __init__(self, operation: str, attrs: dict) -> None:
+        #: API method (e.g. ``'spreadsheets.get'``)
+        self.operation = operation
+        #: request details (e.g. ``spreadsheet_id``)
+        self.attrs = attrs
+        #: HTTP status of the (last) response (``None`` if unknown)
+        self.status = None
+        #: wall time in seconds
+        self.seconds = 0.0
+        #: number of HTTP requests (including retries)
+        self.attempts = 0
+        #: size of the response bodies
+        self.bytes = 0
+        #: number of returned cell values
+        self.cells = 0
+        #: exception raised by the request (``None`` for success)
+        self.error = None
+
+    def __repr__(self) -> str:
+        return (f'<{self.__class__.__name__} {self.operation}'
+                f' status={self.status!r} seconds={self.seconds:.3f}>')
+
+    @property
+    def retries(self) -> int:
+        """Number of retried HTTP requests (``int``)."""
+        return max(self.attempts - 1, 0)
+
+
+class Metrics:
+    """Thread-safe per-operation request counters with request/response hooks.
+
+    >>> m = Metrics()
+    >>> with m.measure('spreadsheets.get', spreadsheet_id='spam') as event:
+    ...     event.status = 200
+    >>> m.stats()['spreadsheets.get']['requests']
+    1
+    """
+
+    def __init__(self, *, num_retries: int = 0) -> None:
+        #: retries of requests failing with server errors or rate limits
+        self.num_retries = num_retries
+        self.on_request = []
+        self.on_response = []
+        self._lock = threading.Lock()
+        self._stats = collections.defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        self._statuses = collections.Counter()
+
+    @contextlib.contextmanager
+    def measure(self, operation: str, **attrs):
+        """Return context manager timing and recording the request in its block.
+
+        Yields:
+            RequestEvent: event to set ``status``, ``attempts``, ``bytes``,
+                and ``cells`` on
+        """
+        event = RequestEvent(operation, attrs)
+        for func in self.on_request:
+            func(event)
+        start = time.perf_counter()
+        try:
+            yield event
+        except Exception as e:
+            event.error = e
+            if event.status is None:
+                resp = getattr(e, 'resp', None)
+                event.status = getattr(resp, 'status', None)
+            raise
+        finally:
+            event.seconds = time.perf_counter() - start
+            self.record(event)
+            for func in self.on_response:
+                func(event)
+
+    def record(self, event: RequestEvent) -> None:
+        """Add the measurements of ``event`` to the counters."""
+        with self._lock:
+            stats = self._stats[event.operation]
+            stats['requests'] += 1
+            stats['errors'] += event.error is not None
+            stats['retries'] += event.retries
+            stats['seconds'] += event.seconds
+            stats['bytes'] += event.bytes
+            stats['cells'] += event.cells
+            self._statuses[event.operation, event.status] += 1
+
+    def stats(self) -> dict[str, dict]:
+        """Return a copy of the counters by operation (with counts by ``statuses``)."""
+        with self._lock:
+            result = {op: dict(s, statuses={}) for op, s in self._stats.items()}
+            for (op, status), count in self._statuses.items():
+                result[op]['statuses'][status] = count
+        return result
+
+    def to_prometheus(self) -> str:
+        """Return the counters in Prometheus text exposition format.
+
+        >>> m = Metrics()
+        >>> with m.measure('files.list') as event:
+        ...     event.status, event.bytes = 200, 42
+        >>> print(m.to_prometheus())  # doctest: +ELLIPSIS
+        # HELP gsheets_requests_total Number of API requests.
+        # TYPE gsheets_requests_total counter
+        gsheets_requests_total{operation="files.list",status="200"} 1
+        ...
+        gsheets_response_bytes_total{operation="files.list"} 42
+        ...
+        """
+        stats = self.stats()
+        lines = []
+        for field, name, kind, help in PROMETHEUS:
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+            for op, s in sorted(stats.items()):
+                if field == 'requests':
+                    lines += [f'{name}{{operation="{op}",status="{status or ""}"}} {count}'
+                              for status, count in s['statuses'].items()]
+                else:
+                    lines.append(f'{name}{{operation="{op}"}} {s[field]}')
+        return '\n'.join(lines) + '\n'
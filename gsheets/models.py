@@ -1,26 +1,93 @@
 """Python objects for spreadsheets consisting of worksheets."""
 
+import collections
+import hashlib
+import os
+import types
+
 from . import backend
 from . import coordinates
 from . import export
+from . import profiling
+from . import snapshot
 from . import tools
 from . import urls
+from . import views
 
 __all__ = ['SpreadSheet', 'SheetsView', 'WorkSheet']
 
+FILL_VALUE = ''
+
 
 class SpreadSheet:
     """Fetched collection of worksheets."""
 
+    __slots__ = ('_id', '_title', '_url', '_sheets', '_map', '_titles',
+                 '_service', '_api', '__weakref__')
+
     @classmethod
-    def _from_response(cls, response, service):
+    def _from_response(cls, response, service, *, sheets=None,
+                       fill_value=FILL_VALUE, intern_strings=False,
+                       value_render_option=backend.VALUE_RENDER_OPTION,
+                       date_time_render_option=backend.DATE_TIME_RENDER_OPTION):
         id = response['spreadsheetId']
         title = response['properties']['title']
-        ranges = [backend.quote(s['properties']['title'])
-                  for s in response['sheets']]
-        values = backend.values(service, id, ranges)
-        sheets = map(WorkSheet._from_response, response['sheets'], values)
-        return cls(id, title, list(sheets), service)
+        sheets = cls._select_sheets(response['sheets'], sheets)
+        ranges = [backend.quote(s['properties']['title']) for s in sheets]
+        values = backend.values(service, id, ranges,
+                                value_render_option=value_render_option,
+                                date_time_render_option=date_time_render_option
+                                ) if ranges else []
+        strings = {} if intern_strings else None
+        sheets = [WorkSheet._from_response(s, v, fill_value=fill_value,
+                                           strings=strings)
+                  for s, v in zip(sheets, values)]
+        return cls(id, title, sheets, service)
+
+    @staticmethod
+    def _select_sheets(sheets, titles_or_ids):
+        """Return the ``sheets`` responses matching ``titles_or_ids`` in order.
+
+        >>> sheets = [{'properties': {'title': 'Spam', 'sheetId': 0}},
+        ...           {'properties': {'title': 'Eggs', 'sheetId': 42}}]
+
+        >>> [s['properties']['title'] for s in SpreadSheet._select_sheets(sheets, [42])]
+        ['Eggs']
+
+        >>> SpreadSheet._select_sheets(sheets, ['Ham'])
+        Traceback (most recent call last):
+            ...
+        KeyError: 'Ham'
+        """
+        if titles_or_ids is None:
+            return sheets
+        wanted = set(titles_or_ids)
+        result = [s for s in sheets
+                  if s['properties']['title'] in wanted
+                  or s['properties']['sheetId'] in wanted]
+        found = {key for s in result
+                 for key in (s['properties']['title'], s['properties']['sheetId'])}
+        for key in titles_or_ids:
+            if key not in found:
+                raise KeyError(key)
+        return result
+
+    @classmethod
+    def load(cls, fp, *, api=None):
+        """Return a spreadsheet loaded from a binary snapshot file.
+
+        Args:
+            fp: binary file object (see ``dump()``)
+            api (Sheets): instance to use for fetching (see ``attach()``)
+        Returns:
+            SpreadSheet: new SpreadSheet instance
+        Raises:
+            ValueError: if ``fp`` does not contain a supported snapshot
+        """
+        self = cls.__new__(cls)
+        self._restore(snapshot.load(fp))
+        self._api = api
+        return self
 
     def __init__(self, id, title, sheets, service) -> None:
         self._id = id
@@ -32,6 +99,36 @@ class SpreadSheet:
         self._map = {s.id: s for s in sheets}
         self._titles = tools.group_dict(sheets, lambda s: s.title)
         self._service = service
+        self._api = None
+
+    def __getstate__(self):
+        return snapshot.dumps(self)
+
+    def __setstate__(self, state) -> None:
+        self._restore(snapshot.loads(state))
+
+    def _restore(self, infos) -> None:
+        sheets = [WorkSheet(s['id'], s['title'], s['index'], s['values'],
+                            fill_value=s['fill_value'])
+                  for s in infos['sheets']]
+        self.__init__(infos['id'], infos['title'], sheets, None)
+
+    def _get_service(self):
+        """Return the sheets service, fetch it from ``_api`` if needed."""
+        if self._service is None:
+            if self._api is None:
+                raise RuntimeError(f'no Sheets instance attached to {self!r}')
+            self._service = self._api._sheets
+        return self._service
+
+    def attach(self, api) -> None:
+        """Use the given ``Sheets`` instance for fetching (e.g. after ``load()``).
+
+        Args:
+            api (Sheets): instance providing the API service endpoint
+        """
+        self._api = api
+        self._service = None
 
     def __repr__(self) -> str:
         return f'<{self.__class__.__name__} {self._url.short_id} {self._title!r}>'
@@ -140,6 +237,27 @@ class SpreadSheet:
         see https://developers.google.com/sheets/guides/concepts#a1_notation
         """
 
+    def values_by_metadata(self, key, value=None) -> dict[str, list[list]]:
+        """Fetch and return the values of the ranges labeled with developer metadata.
+
+        Args:
+            key (str): metadata key of the ranges
+            value (str): metadata value of the ranges (default: any)
+        Returns:
+            dict: mapping from range in A1 notation to list of lists with values
+
+        All matching ranges are fetched with a single request.
+
+        see https://developers.google.com/sheets/api/guides/metadata
+        """
+        lookup = {'metadataKey': key}
+        if value is not None:
+            lookup['metadataValue'] = value
+        data_filters = [{'developerMetadataLookup': lookup}]
+        valueranges = backend.values(self._get_service(), self._id,
+                                     data_filters=data_filters)
+        return {v['range']: v.get('values', []) for v in valueranges}
+
     @property
     def sheets(self):
         """List view of the worksheets in the spreadsheet (positional access). """
@@ -195,20 +313,56 @@ class SpreadSheet:
                      dialect=dialect,
                      make_filename=make_filename)
 
+    def to_sqlite(self, path, *, if_exists='fail', **kwargs) -> None:
+        r"""Dump all non-empty worksheets into tables of an SQLite database.
+
+        Args:
+            path: database filename or open :class:`sqlite3.Connection`
+            if_exists (str): ``'fail'``, ``'replace'``, or ``'append'``
+            \**kwargs: passed to ``WorkSheet.to_sqlite()`` (e.g. ``header``)
+
+        Each worksheet is loaded into the table named after its title.
+        """
+        if isinstance(path, (str, os.PathLike)):
+            import sqlite3
+
+            conn = sqlite3.connect(path)
+            try:
+                self.to_sqlite(conn, if_exists=if_exists, **kwargs)
+            finally:
+                conn.close()
+            return
+        for s in self._sheets:
+            if s.ncols:
+                s.to_sqlite(path, if_exists=if_exists, **kwargs)
+
+    def dump(self, fp) -> None:
+        """Write a compact binary snapshot of the spreadsheet values to ``fp``.
+
+        Args:
+            fp: binary file object (e.g. ``open(filename, 'wb')``)
+
+        The snapshot does not contain the API service endpoint, load it with
+        ``SpreadSheet.load()`` and use ``attach()`` for fetching again.
+        """
+        snapshot.dump(self, fp)
+
 
 class SheetsView(tools.list_view):
     """Read-only view on the list of worksheets in a spreadsheet."""
 
+    __slots__ = ()
+
     def __eq__(self, other):
         if isinstance(other, SheetsView):
-            return (self.titles() == other.titles()
-                    and all(s == o for s, o in zip(self._items, other._items)))
+            return (len(self._items) == len(other._items)
+                    and all(s._title == o._title and s.digest == o.digest
+                            for s, o in zip(self._items, other._items)))
         return NotImplemented
 
     def __ne__(self, other):
         if isinstance(other, SheetsView):
-            return (self.titles() != other.titles()
-                    or any(s != o for s, o in zip(self._items, other._items)))
+            return not self == other
         return NotImplemented
 
     def __getitem__(self, index):
@@ -245,21 +399,77 @@ class SheetsView(tools.list_view):
 class WorkSheet:
     """Two-dimensional table with cells accessible via A1 notation."""
 
+    __slots__ = ('_id', '_title', '_index', '_fill_value', '_values', '_shape',
+                 '_cache', '_spreadsheet', '__weakref__')
+
     @classmethod
-    def _from_response(cls, response, valuerange):
+    def _from_response(cls, response, valuerange, *, fill_value=FILL_VALUE,
+                       strings=None):
         prop = response['properties']
         id = prop['sheetId']
         title = prop['title']
         index = prop['index']
-        values = valuerange.get('values', [[]])
-        return cls(id, title, index, values)
-
-    def __init__(self, id, title, index, values) -> None:
+        with profiling.phase(f'worksheet {title}'), profiling.phase('model'):
+            values = valuerange.get('values', [[]])
+            if strings is not None:
+                tools.dedupe_strings(values, strings)
+            return cls(id, title, index, values, fill_value=fill_value)
+
+    def __init__(self, id, title, index, values, *,
+                 fill_value=FILL_VALUE) -> None:
         self._id = id
         self._title = title
         self._index = index
-        self._values = values
+        self._fill_value = fill_value
+        self._load(values)
+        self._spreadsheet = None
+
+    @classmethod
+    def open_snapshot(cls, filename, sheet=None):
+        """Return a read-only worksheet decoding its values lazily from a snapshot file.
+
+        Args:
+            filename: snapshot file (see ``SpreadSheet.dump()``)
+            sheet: worksheet id (``int``) or title (``str``), ``None`` for the first
+        Returns:
+            WorkSheet: new WorkSheet instance (without spreadsheet)
+        Raises:
+            KeyError: if there is no worksheet matching ``sheet``
+            ValueError: if ``filename`` does not contain a supported snapshot
+
+        The file is memory-mapped read-only, so processes opening the same
+        snapshot share its pages; rows are decoded on access.
+        """
+        infos, rows = snapshot.open_mapped(filename, sheet)
+        self = cls.__new__(cls)
+        self._id = infos['id']
+        self._title = infos['title']
+        self._index = infos['index']
+        self._fill_value = infos['fill_value']
+        self._load(rows, shape=(infos['nrows'], infos['ncols']))
         self._spreadsheet = None
+        return self
+
+    def _load(self, values, *, shape=None) -> None:
+        """Set ``values`` padding (in-place) all rows to the same length."""
+        if shape is None:
+            ncols = max(map(len, values), default=0)
+            fill = [self._fill_value]
+            for row in values:
+                if len(row) < ncols:
+                    row.extend(fill * (ncols - len(row)))
+            shape = (len(values), ncols)
+        self._values = values
+        self._shape = shape
+        self._cache = {}
+
+    def __getstate__(self):
+        return {'id': self._id, 'title': self._title, 'index': self._index,
+                'fill_value': self._fill_value, 'values': list(self._values)}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state['id'], state['title'], state['index'], state['values'],
+                      fill_value=state['fill_value'])
 
     def __repr__(self) -> str:
         return (f'<{self.__class__.__name__} {self._id:d} {self._title!r}'
@@ -267,26 +477,30 @@ class WorkSheet:
 
     def __eq__(self, other):
         if isinstance(other, WorkSheet):
-            return self._values == other._values
+            return self is other or self.digest == other.digest
         return NotImplemented
 
     def __ne__(self, other):
         if isinstance(other, WorkSheet):
-            return self._values != other._values
+            return not self == other
         return NotImplemented
 
     def __getitem__(self, index):
         """Return the value(s) of the given cell(s).
 
         Args:
-            index (str): cell/row/col index ('A1', '2', 'B') or slice ('A1':'C3')
+            index (str): cell/row/col index ('A1', '2', 'B') or slice ('A1':'C3'),
+                columns up to 'ZZZ', optionally absolute ('$A$1') or with
+                the worksheet title as sheet prefix ('Sheet1!A1')
         Returns:
             value (cell), list(col, row), or nested list (two-dimentional slice)
         Raises:
             TypeError: if ``index`` is not a string or slice of strings
-            ValueError: if ``index`` canot be parsed
+            ValueError: if ``index`` canot be parsed or has a sheet prefix
+                other than the worksheet title
             IndexError: if ``index`` is out of range
         """
+        coordinates.check_sheet(index, self._title)
         getter = coordinates.Coordinates.from_string(index)
         return getter(self._values)
 
@@ -306,6 +520,70 @@ class WorkSheet:
             raise TypeError(row, col)
         return self._values[row][col]
 
+    def get_many(self, keys, *, default=None) -> list:
+        """Return the values of the given cells/slices in input order.
+
+        Args:
+            keys: iterable of indexes (see ``__getitem__()``)
+            default: value for cells/slices that are out of range
+        Returns:
+            list: list of values
+        Raises:
+            TypeError: if an index is not a string or slice of strings
+            ValueError: if an index canot be parsed or has a sheet prefix
+                other than the worksheet title
+        """
+        keys = list(keys)
+        for k in keys:
+            coordinates.check_sheet(k, self._title)
+        getters = [coordinates.Coordinates.from_string(k) for k in keys]
+        cells = [i for i, g in enumerate(getters) if type(g) is coordinates.Cell]
+        result = [default] * len(getters)
+        if cells:
+            gathered = self.gather([(getters[i].row, getters[i].col) for i in cells],
+                                   default=default)
+            for i, value in zip(cells, gathered):
+                result[i] = value
+        for i, g in enumerate(getters):
+            if type(g) is not coordinates.Cell:
+                try:
+                    result[i] = g(self._values)
+                except IndexError:
+                    pass
+        return result
+
+    def gather(self, cells, *, default=None) -> list:
+        """Return the values at the given cell positions in input order.
+
+        Args:
+            cells: sequence of ``(row, col)`` pairs of zero-based ``int`` positions
+            default: value for positions that are out of range (or negative)
+        Returns:
+            list: list of cell values
+        Raises:
+            TypeError: if a position is not a pair of ``int``
+
+        Positions are looked up grouped by row.
+        """
+        result = [default] * len(cells)
+        rows = tools.group_dict(range(len(cells)), lambda i: cells[i][0])
+        for row, indexes in rows.items():
+            if row < 0:
+                continue
+            try:
+                values = self._values[row]
+            except IndexError:
+                continue
+            for i in indexes:
+                col = cells[i][1]
+                if col < 0:
+                    continue
+                try:
+                    result[i] = values[col]
+                except IndexError:
+                    pass
+        return result
+
     def values(self, *, column_major=False):
         """Return a nested list with the worksheet values.
 
@@ -318,6 +596,138 @@ class WorkSheet:
             return list(map(list, zip(*self._values)))
         return [row[:] for row in self._values]
 
+    def query(self, query, *, headers=None):
+        """Fetch and return the rows matching ``query`` (filtered server-side).
+
+        Args:
+            query (str): visualization API query language string
+                (e.g. ``'select A, C where D > 100'``)
+            headers (int): number of header rows (default: guessed by the server)
+        Returns:
+            list: list of lists with values
+        Raises:
+            ValueError: if the server rejects the ``query``
+            RuntimeError: if the worksheet has no ``Sheets`` instance to fetch
+                with (e.g. after ``open_snapshot()`` or unpickling)
+
+        see https://developers.google.com/chart/interactive/docs/querylanguage
+        """
+        spreadsheet = self._spreadsheet
+        if spreadsheet is None:
+            raise RuntimeError(f'no Sheets instance attached to {self!r}')
+        return backend.query(spreadsheet._get_service(), spreadsheet._id, self._id,
+                             query, headers=headers, fill_value=self._fill_value)
+
+    def records(self, header=1, *, dates=None):
+        """Yield the rows below the ``header`` row as named tuples.
+
+        Args:
+            header (int): one-based row number of the column names
+                (``None`` for all rows with column letters as names)
+            dates: column names or zero-based positions with serial day
+                numbers to convert to ``datetime.datetime`` (requires
+                fetching with ``date_time_render_option='SERIAL_NUMBER'``)
+        Yields:
+            ``collections.namedtuple`` instances (invalid or duplicate
+            column names are replaced by positional names, e.g. ``_2``)
+        Raises:
+            ValueError: if ``header`` is less than 1
+        """
+        self._check_header(header)
+        make = self._record_type(header)._make
+        values = self._values if header is None else self._values[header:]
+        if dates:
+            cols = [self._column_index(d, header) for d in dates]
+            values = export.convert_columns(values, cols, export.from_serial)
+        return map(make, values)
+
+    def index_on(self, column, *, header=1):
+        """Return the (cached) hash index of the rows below ``header`` by ``column``.
+
+        Args:
+            column: column name from the ``header`` row or zero-based position
+            header (int): one-based row number of the column names
+        Returns:
+            mapping: read-only ``dict`` from cell value to zero-based row number
+                (first row for duplicate values)
+        Raises:
+            KeyError: if there is no ``column`` with the given name
+            ValueError: if ``header`` is less than 1
+
+        The index is dropped when the worksheet values are reloaded.
+        """
+        self._check_header(header)
+        key = ('index', header, column)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        col = self._column_index(column, header)
+        index = {}
+        for i in range(header or 0, self._shape[0]):
+            index.setdefault(self._values[i][col], i)
+        result = self._cache[key] = types.MappingProxyType(index)
+        return result
+
+    def lookup(self, column, value, default=None, *, header=1):
+        """Return the first record with ``value`` in ``column`` using the index.
+
+        Args:
+            column: column name from the ``header`` row or zero-based position
+            value: cell value to look up
+            default: return value if no row has the given ``value``
+            header (int): one-based row number of the column names
+        Returns:
+            ``collections.namedtuple`` instance (see ``records()``) or given default
+        Raises:
+            KeyError: if there is no ``column`` with the given name
+            ValueError: if ``header`` is less than 1
+        """
+        index = self.index_on(column, header=header)
+        try:
+            row = index[value]
+        except KeyError:
+            return default
+        return self._record_type(header)._make(self._values[row])
+
+    @staticmethod
+    def _check_header(header) -> None:
+        if header is not None and header < 1:
+            raise ValueError(f'header must be a one-based row number or None: {header!r}')
+
+    def _record_type(self, header):
+        key = ('record', header)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        names = self._column_names(header)
+        result = self._cache[key] = collections.namedtuple('Record', names,
+                                                           rename=True)
+        return result
+
+    def _column_names(self, header) -> list[str]:
+        if header is None:
+            return [coordinates.base26(i) for i in range(1, self._shape[1] + 1)]
+        return ['' if n is None else str(n) for n in self._values[header - 1]]
+
+    def _column_index(self, column, header) -> int:
+        if isinstance(column, int):
+            return column
+        try:
+            return self._column_names(header).index(column)
+        except ValueError:
+            raise KeyError(column)
+
+    @property
+    def view(self):
+        """Index access to read-only views on the worksheet values (no copying).
+
+        ``ws.view['A1':'D1000']`` returns a ``Window`` supporting ``len()``,
+        iteration, indexing, and slicing; use its ``.tolist()`` method to copy.
+        """
+        return views.CellsView(self._values, title=self._title)
+
     @property
     def spreadsheet(self):
         """Containing spreadsheet of the worksheet."""
@@ -349,17 +759,62 @@ class WorkSheet:
     @property
     def nrows(self) -> int:
         """Number of rows in the worksheet (``int``)."""
-        return len(self._values)
+        return self._shape[0]
 
     @property
     def ncols(self) -> int:
         """Number of columns in the worksheet (int)."""
-        return len(self._values[0])
+        return self._shape[1]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Number of rows and number of columns (``tuple``)."""
+        return self._shape
+
+    @property
+    def fill_value(self):
+        """Value of the cells padding rows with trailing empty cells."""
+        return self._fill_value
 
     @property
     def ncells(self) -> int:
         """Number of cells in the worksheet (``int``)."""
-        return self.nrows * self.ncols
+        nrows, ncols = self._shape
+        return nrows * ncols
+
+    @property
+    def digest(self) -> str:
+        """Stable hex digest of the worksheet values (``str``, computed once).
+
+        Covers the shape, ``fill_value``, and the values of all cells
+        (e.g. for cache keys or checking whether a worksheet has changed).
+        """
+        try:
+            return self._cache['digest']
+        except KeyError:
+            pass
+        h = hashlib.blake2b(digest_size=tools.DIGEST_SIZE)
+        h.update(tools.dump_json([self._shape, self._fill_value]).encode('utf-8'))
+        for d in self.row_digests:
+            h.update(d)
+        result = self._cache['digest'] = h.hexdigest()
+        return result
+
+    @property
+    def row_digests(self) -> tuple[bytes, ...]:
+        """Stable digests of the row values (``tuple`` of ``bytes``, computed once).
+
+        Trailing ``fill_value`` cells are ignored, i.e. rows of worksheets
+        with different ``ncols`` can be compared.
+        """
+        try:
+            return self._cache['row_digests']
+        except KeyError:
+            pass
+        fill_value = self._fill_value
+        result = tuple(tools.digest_row(r, fill_value) for r in self._values)
+        self._cache['row_digests'] = result
+        return result
 
     def to_csv(self, filename=None, *,
                encoding=export.ENCODING,
@@ -396,19 +851,54 @@ class WorkSheet:
                 filename = make_filename % infos
             else:
                 filename = make_filename(infos)
-        with open(filename, 'w', encoding=encoding, newline='') as fd:
-            export.write_csv(fd, self._values, dialect=dialect)
+        with profiling.phase(f'worksheet {self._title}'):
+            with open(filename, 'w', encoding=encoding, newline='') as fd:
+                export.write_csv(fd, self._values, dialect=dialect)
 
-    def to_frame(self, *, assign_name=False, **kwargs):
+    def to_frame(self, *, assign_name=False, dates=None, **kwargs):
         r"""Return a pandas DataFrame loaded from the worksheet data.
 
         Args:
             assign_name (bool): set name attribute on the DataFrame to sheet title.
+            dates: ``DataFrame`` columns with serial day numbers to convert to
+                ``datetime64`` (requires fetching with
+                ``date_time_render_option='SERIAL_NUMBER'``)
             \**kwargs: passed to ``pandas.read_csv()`` (e.g. ``header``, ``index_col``)
         Returns:
             pandas.DataFrame: new ``DataFrame`` instance
         """
-        df = export.write_dataframe(self._values, **kwargs)
+        with profiling.phase(f'worksheet {self._title}'):
+            df = export.write_dataframe(self._values, dates=dates, **kwargs)
         if assign_name:
             df.name = self.title
         return df
+
+    def to_sqlite(self, conn, table=None, *, if_exists='fail', header=True,
+                  infer_rows=export.INFER_ROWS,
+                  batch_size=export.BATCH_SIZE) -> int:
+        """Load the worksheet into a table of an SQLite database.
+
+        Args:
+            conn (sqlite3.Connection): open database connection
+            table (str): table name (if ``None`` use the worksheet title)
+            if_exists (str): ``'fail'``, ``'replace'``, or ``'append'``
+            header (bool): use the first row as column names
+            infer_rows (int): number of rows to infer column affinities from
+            batch_size (int): number of rows per ``executemany()`` call
+        Returns:
+            int: number of inserted rows
+        Raises:
+            ValueError: if the table exists and ``if_exists`` is ``'fail'``
+
+        All rows are inserted within a single savepoint (an open transaction
+        of ``conn`` is neither committed nor rolled back). Empty cells (``''``
+        and ``None``) are inserted as ``NULL``, other values as they are
+        (including a non-empty ``fill_value`` of padded cells).
+        """
+        if table is None:
+            table = self._title
+        with profiling.phase(f'worksheet {self._title}'):
+            return export.write_sqlite(conn, table, self._values,
+                                       if_exists=if_exists, header=header,
+                                       infer_rows=infer_rows,
+                                       batch_size=batch_size)
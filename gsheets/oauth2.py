@@ -1,13 +1,17 @@
 """Helpers for doing OAuth 2.0 authentification."""
 
+import importlib
 import os
 
-from oauth2client import file, client, tools
-
+from . import profiling
 from .tools import doctemplate
 
 __all__ = ['get_credentials']
 
+LAZY_MODULES = {'file': 'oauth2client.file',
+                'client': 'oauth2client.client',
+                'tools': 'oauth2client.tools'}
+
 SCOPES = 'read'
 
 SECRETS = '~/client_secrets.json'
@@ -38,18 +42,38 @@ def get_credentials(scopes=None, secrets=None, storage=None, *,
 
     secrets, storage = map(os.path.expanduser, (secrets, storage))
 
-    store = file.Storage(storage)
-    creds = store.get()
+    file, client, tools = map(_lazy_module, ('file', 'client', 'tools'))
 
-    if creds is None or creds.invalid:
-        flow = client.flow_from_clientsecrets(secrets, scopes)
-        args = ['--noauth_local_webserver'] if no_webserver else []
-        flags = tools.argparser.parse_args(args)
-        creds = tools.run_flow(flow, store, flags)
+    with profiling.phase('auth'):
+        store = file.Storage(storage)
+        creds = store.get()
+
+        if creds is None or creds.invalid:
+            flow = client.flow_from_clientsecrets(secrets, scopes)
+            args = ['--noauth_local_webserver'] if no_webserver else []
+            flags = tools.argparser.parse_args(args)
+            creds = tools.run_flow(flow, store, flags)
 
     return creds
 
 
+def __getattr__(name):
+    """Import ``oauth2client`` modules on first access (fast ``import gsheets``)."""
+    try:
+        module = LAZY_MODULES[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    result = globals()[name] = importlib.import_module(module)
+    return result
+
+
+def _lazy_module(name: str):
+    try:
+        return globals()[name]
+    except KeyError:
+        return __getattr__(name)
+
+
 class Scopes:
     """URLs for read or read/write access to Google sheets and drive.
 
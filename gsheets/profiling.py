@@ -0,0 +1,139 @@
+"""Wall and CPU time per phase of fetching, model construction, and export."""
+
+import contextlib
+import contextvars
+import threading
+import time
+
+__all__ = ['profile', 'active', 'phase', 'timed', 'Profile']
+
+_profile = contextvars.ContextVar('gsheets_profile', default=None)
+
+_path = contextvars.ContextVar('gsheets_profile_path', default=())
+
+
+@contextlib.contextmanager
+def profile():
+    """Return a context manager collecting the time per phase in its block.
+
+    Yields:
+        Profile: collected wall and CPU times (see ``Profile.report()``)
+
+    >>> import gsheets
+    >>> with gsheets.profile() as p:
+    ...     with phase('spreadsheet spam'):
+    ...         with phase('request spreadsheets.get'):
+    ...             pass
+    >>> sorted(p.stats())
+    [('spreadsheet spam',), ('spreadsheet spam', 'request spreadsheets.get')]
+    """
+    result = Profile()
+    token = _profile.set(result)
+    try:
+        yield result
+    finally:
+        _profile.reset(token)
+
+
+def active() -> bool:
+    """Return if called within ``profile()``."""
+    return _profile.get() is not None
+
+
+def timed(name: str, func):
+    """Return wrapper of ``func`` timing its calls as phase ``name``."""
+    def wrapper(*args, **kwargs):
+        with phase(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def phase(name: str):
+    """Return a context manager timing its block as ``name`` (nested in the current phase).
+
+    Returns a no-op context manager unless called within ``profile()``.
+    """
+    profile = _profile.get()
+    if profile is None:
+        return NULL_PHASE
+    return Phase(profile, name)
+
+
+NULL_PHASE = contextlib.nullcontext()
+
+
+class Phase:
+
+    __slots__ = ('_profile', '_name', '_token', '_wall', '_cpu')
+
+    def __init__(self, profile, name: str) -> None:
+        self._profile = profile
+        self._name = name
+
+    def __enter__(self):
+        self._token = _path.set(_path.get() + (self._name,))
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        self._profile.add(_path.get(), wall, cpu)
+        _path.reset(self._token)
+        return None
+
+
+class Profile:
+    """Calls, wall time, and CPU time (seconds) by nested phase path."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def add(self, path: tuple[str, ...], wall: float, cpu: float) -> None:
+        """Add one call of the phase ``path`` taking ``wall`` and ``cpu`` seconds."""
+        with self._lock:
+            calls, total_wall, total_cpu = self._stats.get(path, (0, 0.0, 0.0))
+            self._stats[path] = (calls + 1, total_wall + wall, total_cpu + cpu)
+
+    def stats(self) -> dict[tuple[str, ...], tuple[int, float, float]]:
+        """Return a dict mapping phase paths to ``(calls, wall, cpu)`` triples."""
+        with self._lock:
+            return dict(self._stats)
+
+    def report(self) -> str:
+        """Return the phases as indented tree with siblings sorted by wall time.
+
+        >>> p = Profile()
+        >>> p.add(('spreadsheet spam',), 0.5, 0.125)
+        >>> p.add(('spreadsheet spam', 'model'), 0.125, 0.125)
+        >>> p.add(('spreadsheet spam', 'request values.batchGet'), 0.25, 0.0)
+        >>> print(p.report())
+            wall      cpu  calls  phase
+           0.500    0.125      1  spreadsheet spam
+           0.250    0.000      1    request values.batchGet
+           0.125    0.125      1    model
+        """
+        stats = self.stats()
+        children = {}
+        for path in stats:
+            children.setdefault(path[:-1], []).append(path)
+
+        lines = [f'{"wall":>8} {"cpu":>8} {"calls":>6}  phase']
+
+        def add_lines(parent):
+            paths = sorted(children.get(parent, ()), key=lambda p: -stats[p][1])
+            for path in paths:
+                calls, wall, cpu = stats[path]
+                indent = '  ' * (len(path) - 1)
+                lines.append(f'{wall:8.3f} {cpu:8.3f} {calls:6d}  {indent}{path[-1]}')
+                add_lines(path)
+
+        add_lines(())
+        return '\n'.join(lines)
+
+    def print_report(self, file=None) -> None:
+        """Print ``report()`` to ``file`` (default: ``sys.stdout``)."""
+        print(self.report(), file=file)
@@ -0,0 +1,194 @@
+"""Record API exchanges to disk and replay them offline (benchmarks and tests)."""
+
+import base64
+import collections
+import email
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+
+import httplib2
+
+__all__ = ['RecordingHttp', 'ReplayHttp', 'NotRecorded']
+
+DROP_PARAMS = {'key'}
+
+BATCH_PATH = '/batch'
+
+ENCODING = 'utf-8'
+
+
+class NotRecorded(LookupError):
+    """Raised by ``ReplayHttp`` for requests without recorded response."""
+
+
+def request_key(uri: str, method: str = 'GET', body=None) -> tuple[str, str, str | None]:
+    """Return the ``(method, uri, body_digest)`` to match recorded requests with.
+
+    Drops API keys from ``uri`` and sorts its query parameters. Batch requests
+    are matched by their parts (see ``batch_requests()``).
+
+    >>> request_key('https://example.com/v4/spam?key=secret&b=2&a=1')
+    ('GET', 'https://example.com/v4/spam?a=1&b=2', None)
+
+    >>> request_key('https://example.com/v4/spam', 'POST', '{}')[2]
+    '01e7b720ff566d53'
+    """
+    parts = urllib.parse.urlsplit(uri)
+    params = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+              if k not in DROP_PARAMS]
+    query = urllib.parse.urlencode(sorted(params))
+    uri = urllib.parse.urlunsplit(parts._replace(query=query))
+    if body is not None:
+        if method.upper() == 'POST' and parts.path.endswith(BATCH_PATH):
+            body = json.dumps(batch_requests(body))
+        if isinstance(body, str):
+            body = body.encode(ENCODING)
+        body = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return method.upper(), uri, body
+
+
+def batch_requests(body) -> list[list]:
+    """Return ``[request_id, *request_key()]`` for the parts of batch request ``body``.
+
+    Leaves out the random multipart boundary and ``Content-ID`` prefix and
+    the headers of the requests.
+
+    >>> body = (
+    ...     '--===1==\\nContent-Type: application/http\\nContent-ID: <0f1e + spam>\\n\\n'
+    ...     'GET /v4/spreadsheets/spam?key=secret&alt=json HTTP/1.1\\nHost: example.com\\n\\n\\n'
+    ...     '--===1==--\\n')
+    >>> batch_requests(body)
+    [['spam', 'GET', '/v4/spreadsheets/spam?alt=json', None]]
+
+    >>> batch_requests(body.replace('\\n', '\\r\\n').encode()) == batch_requests(body)
+    True
+    """
+    if isinstance(body, bytes):
+        body = body.decode(ENCODING)
+    body = body.replace('\r\n', '\n')
+    boundary = body.lstrip('\n').partition('\n')[0][2:]
+    message = email.message_from_string('Content-Type: multipart/mixed;'
+                                        f' boundary="{boundary}"\n\n{body}')
+    result = []
+    for part in message.get_payload():
+        request_id = part['Content-ID'].strip('<>').rpartition(' + ')[2]
+        request, _, request_body = part.get_payload().partition('\n\n')
+        method, uri, _ = request.partition('\n')[0].split(' ', 2)
+        result.append([request_id, *request_key(uri, method, request_body or None)])
+    return result
+
+
+def encode_content(content: bytes) -> dict:
+    """Return JSON-serializable representation of response ``content``.
+
+    >>> encode_content(b'{}'), encode_content(b'\\xff')
+    ({'text': '{}'}, {'base64': '/w=='})
+    """
+    try:
+        return {'text': content.decode(ENCODING)}
+    except UnicodeDecodeError:
+        return {'base64': base64.b64encode(content).decode('ascii')}
+
+
+def decode_content(record: dict) -> bytes:
+    """Return response content from ``encode_content()`` result ``record``.
+
+    >>> decode_content({'text': '{}'}), decode_content({'base64': '/w=='})
+    (b'{}', b'\\xff')
+    """
+    if 'text' in record:
+        return record['text'].encode(ENCODING)
+    return base64.b64decode(record['base64'])
+
+
+class RecordingHttp:
+    """Proxy for an ``httplib2.Http`` instance appending its exchanges to ``filename``.
+
+    Records method, URI (without API key), body digest, status, content type,
+    and content of each exchange as one JSON line (no request headers or
+    credentials). Thread-safe: requests are serialized (one at a time).
+
+    Args:
+        http: ``httplib2.Http``-like object sending the requests
+            (e.g. authorized with the credentials)
+        filename: path of the JSON lines file to append to
+    """
+
+    def __init__(self, http, filename) -> None:
+        self._http = http
+        self._filename = filename
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        with self._lock:
+            resp, content = self._http.request(uri, method, body=body,
+                                               headers=headers, **kwargs)
+            method, key_uri, body_digest = request_key(uri, method, body)
+            record = {'method': method, 'uri': key_uri, 'body': body_digest,
+                      'status': resp.status,
+                      'content-type': resp.get('content-type'),
+                      **encode_content(content or b'')}
+            with open(self._filename, 'a', encoding=ENCODING) as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return resp, content
+
+
+class ReplayHttp:
+    """``httplib2.Http`` replacement serving responses recorded with ``RecordingHttp``.
+
+    Repeated requests get the recorded responses in order, the last one
+    is repeated. Simulates network transfer by sleeping ``latency``
+    plus the content size divided by ``bandwidth`` for each request.
+    Thread-safe (one instance can be shared by all service endpoints).
+
+    Args:
+        filename: path of the JSON lines file with the recorded exchanges
+        latency (float): seconds to wait before each response
+        bandwidth (float): bytes per second (default: no transfer delay)
+    """
+
+    def __init__(self, filename, *, latency: float = 0.0,
+                 bandwidth: float | None = None) -> None:
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._responses = collections.defaultdict(list)
+        with open(filename, encoding=ENCODING) as f:
+            for line in f:
+                record = json.loads(line)
+                key = record['method'], record['uri'], record['body']
+                self._responses[key].append(record)
+        self._served = collections.Counter()
+        self._lock = threading.Lock()
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        key = request_key(uri, method, body)
+        with self._lock:
+            records = self._responses.get(key)
+            if not records:
+                raise NotRecorded(key)
+            record = records[min(self._served[key], len(records) - 1)]
+            self._served[key] += 1
+
+        content = decode_content(record)
+        delay = self.latency
+        if self.bandwidth:
+            delay += len(content) / self.bandwidth
+        if delay:
+            time.sleep(delay)
+
+        info = {'status': record['status']}
+        if record.get('content-type') is not None:
+            info['content-type'] = record['content-type']
+        return httplib2.Response(info), content
+
+    def stats(self) -> dict[str, int]:
+        """Return the numbers of recorded ``exchanges`` and of ``served`` responses."""
+        with self._lock:
+            return {'exchanges': sum(map(len, self._responses.values())),
+                    'served': sum(self._served.values())}
@@ -0,0 +1,324 @@
+"""Compact versioned binary snapshots of spreadsheet values.
+
+File layout (little-endian)::
+
+    MAGIC VERSION  column data ...  header (JSON)  header offset (u64) MAGIC
+
+Values are stored column-wise per worksheet, each column with a type tag:
+``'c'`` (constant, value in the header), ``'b'``, ``'h'``, ``'i'``, ``'q'``
+(int8, int16, int32, int64 array), ``'d'`` (float64 array), or ``'s'`` (utf-8
+strings with u32 or u64 end offsets, typecode ``'I'`` or ``'Q'`` in the
+header). Cells not
+fitting the column type (e.g. header rows) are stored as exceptions in the
+header (pairs of row index and JSON value), with placeholders in the array.
+"""
+
+import array
+import json
+import mmap
+import struct
+import sys
+
+__all__ = ['dump', 'dumps', 'load', 'loads', 'open_mapped', 'MappedRows']
+
+MAGIC = b'GSHEETS\x00'
+
+VERSION = 2
+
+PREFIX = struct.Struct('<8sI4x')
+
+TRAILER = struct.Struct('<Q8s')
+
+CONSTANT_TYPES = (str, int, float, bool, type(None))
+
+PLACEHOLDERS = {'q': 0, 'd': 0.0, 's': '', **dict.fromkeys('bhi', 0)}
+
+INT_RANGES = {t: range(-2**(8 * n - 1), 2**(8 * n - 1))
+              for t, n in [('b', 1), ('h', 2), ('i', 4), ('q', 8)]}
+
+SWAP = sys.byteorder != 'little'
+
+ALIGN = 8
+
+ITEM = {t: struct.Struct(f'<{t}') for t in 'bhiqdIQ'}
+
+
+def dump(spreadsheet, fp) -> None:
+    """Write ``spreadsheet`` snapshot to binary file object ``fp``."""
+    fp.write(dumps(spreadsheet))
+
+
+def dumps(spreadsheet) -> bytes:
+    """Return ``spreadsheet`` snapshot as ``bytes``.
+
+    >>> from gsheets.models import SpreadSheet, WorkSheet
+    >>> ws = WorkSheet(0, 'Spam1', 0, [['spam', 1, 1.5], ['eggs', 2, None]])
+    >>> data = dumps(SpreadSheet('spam', 'Spam', [ws], None))
+    >>> data[:8]
+    b'GSHEETS\\x00'
+
+    >>> loads(data)  # doctest: +NORMALIZE_WHITESPACE
+    {'id': 'spam', 'title': 'Spam',
+     'sheets': [{'id': 0, 'title': 'Spam1', 'index': 0, 'fill_value': '',
+                 'values': [['spam', 1, 1.5], ['eggs', 2, None]]}]}
+    """
+    chunks = [PREFIX.pack(MAGIC, VERSION)]
+    offset = PREFIX.size
+    sheets = []
+    for s in spreadsheet._sheets:
+        nrows, ncols = s._shape
+        columns = []
+        for j in range(ncols):
+            tag, extra, data, exceptions = encode_column([r[j] for r in s._values])
+            padding = -len(data) % ALIGN
+            columns.append([tag, offset, len(data), extra, exceptions])
+            chunks += [data, b'\x00' * padding]
+            offset += len(data) + padding
+        sheets.append({'id': s._id, 'title': s._title, 'index': s._index,
+                       'fill_value': s._fill_value,
+                       'nrows': nrows, 'ncols': ncols, 'columns': columns})
+    header = {'id': spreadsheet._id, 'title': spreadsheet._title, 'sheets': sheets}
+    chunks += [json.dumps(header, separators=(',', ':')).encode('utf-8'),
+               TRAILER.pack(offset, MAGIC)]
+    return b''.join(chunks)
+
+
+def load(fp) -> dict:
+    """Return spreadsheet infos decoded from snapshot in binary file object ``fp``."""
+    return loads(fp.read())
+
+
+def loads(data) -> dict:
+    """Return spreadsheet infos decoded from snapshot ``data`` (bytes-like).
+
+    The result has the keys ``id``, ``title``, and ``sheets`` (list of dicts
+    with the keys ``id``, ``title``, ``index``, ``fill_value``, and ``values``).
+    """
+    data = memoryview(data)
+    header = read_header(data)
+    sheets = []
+    for s in header['sheets']:
+        nrows = s['nrows']
+        if s['ncols']:
+            columns = [decode_column(data, nrows, *c) for c in s['columns']]
+            values = list(map(list, zip(*columns)))
+        else:
+            values = [[] for _ in range(nrows)]
+        sheets.append({'id': s['id'], 'title': s['title'], 'index': s['index'],
+                       'fill_value': s['fill_value'], 'values': values})
+    return {'id': header['id'], 'title': header['title'], 'sheets': sheets}
+
+
+def open_mapped(filename, sheet=None) -> tuple[dict, 'MappedRows']:
+    """Return worksheet infos and lazy rows from memory-mapped snapshot file.
+
+    Args:
+        filename: snapshot file (see ``dump()``)
+        sheet: worksheet id (``int``) or title (``str``), ``None`` for the first
+    Returns:
+        pair of infos ``dict`` (keys ``id``, ``title``, ``index``,
+        ``fill_value``, ``nrows``, and ``ncols``) and rows sequence
+    Raises:
+        KeyError: if there is no worksheet matching ``sheet``
+    """
+    with open(filename, 'rb') as f:
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    header = read_header(data)
+    for s in header['sheets']:
+        if sheet is None or sheet == s['id'] or sheet == s['title']:
+            break
+    else:
+        raise KeyError(sheet)
+    infos = {k: v for k, v in s.items() if k != 'columns'}
+    return infos, MappedRows(data, s['nrows'], s['columns'])
+
+
+class MappedRows:
+    """Read-only sequence of rows decoded on access from snapshot ``data``.
+
+    >>> from gsheets.models import SpreadSheet, WorkSheet
+    >>> ws = WorkSheet(0, 'Spam1', 0, [['spam', 1, 1.5], ['eggs', 2, None]])
+    >>> data = memoryview(dumps(SpreadSheet('spam', 'Spam', [ws], None)))
+    >>> rows = MappedRows(data, 2, read_header(data)['sheets'][0]['columns'])
+
+    >>> len(rows), rows[1], rows[-1][2], rows[:1]
+    (2, ['eggs', 2, None], None, [['spam', 1, 1.5]])
+
+    >>> rows.column(0), rows == ws._values
+    (['spam', 'eggs'], True)
+    """
+
+    def __init__(self, data: memoryview, nrows: int, columns) -> None:
+        self._data = data
+        self._nrows = nrows
+        self._columns = columns
+        self._getters = [self._cell_getter(*c) for c in columns]
+
+    def _cell_getter(self, tag: str, offset: int, size: int, extra, exceptions):
+        getter = self._array_getter(tag, offset, extra)
+        if not exceptions:
+            return getter
+        exceptions = dict(exceptions)
+        return lambda i: exceptions[i] if i in exceptions else getter(i)
+
+    def _array_getter(self, tag: str, offset: int, extra):
+        data = self._data
+        if tag == 'c':
+            return lambda i: extra
+        elif tag != 's':
+            unpack_from, itemsize = ITEM[tag].unpack_from, ITEM[tag].size
+            return lambda i: unpack_from(data, offset + itemsize * i)[0]
+        unpack_end, itemsize = ITEM[extra].unpack_from, ITEM[extra].size
+        blob = offset + itemsize * self._nrows
+
+        def getter(i):
+            start = unpack_end(data, offset + itemsize * (i - 1))[0] if i else 0
+            end = unpack_end(data, offset + itemsize * i)[0]
+            return str(data[blob + start:blob + end], 'utf-8')
+
+        return getter
+
+    def __len__(self) -> int:
+        return self._nrows
+
+    def __iter__(self):
+        return map(self._row, range(self._nrows))
+
+    def __getitem__(self, index):
+        """Return the decoded row at the given index or a list of rows for a slice."""
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._nrows))]
+        return self._row(range(self._nrows)[index])
+
+    def __eq__(self, other):
+        if isinstance(other, (list, MappedRows)):
+            return len(self) == len(other) and all(s == o for s, o in zip(self, other))
+        return NotImplemented
+
+    def _row(self, index: int) -> list:
+        return [get(index) for get in self._getters]
+
+    def column(self, index: int) -> list:
+        """Return the decoded values of the column at the given index."""
+        return decode_column(self._data, self._nrows, *self._columns[index])
+
+
+def read_header(data: memoryview) -> dict:
+    """Return the JSON header of snapshot ``data`` checking magic and version."""
+    if len(data) < PREFIX.size + TRAILER.size:
+        raise ValueError('invalid snapshot: too short')
+    magic, version = PREFIX.unpack_from(data)
+    offset, end_magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+    if magic != MAGIC or end_magic != MAGIC:
+        raise ValueError('invalid snapshot: bad magic')
+    elif version != VERSION:
+        raise ValueError(f'unsupported snapshot version: {version!r}')
+    return json.loads(bytes(data[offset:len(data) - TRAILER.size]))
+
+
+def encode_column(values) -> tuple[str, object, bytes, list]:
+    """Return ``(tag, extra, data, exceptions)`` for the column ``values``.
+
+    Uses the type of most cells for the array, other cells become
+    ``exceptions`` (list of ``[index, value]`` pairs).
+
+    >>> [encode_column(v)[0] for v in ([1, 1], [1, 2], [1, 2**40], [1.5, 2.0], ['a', 'b'])]
+    ['c', 'b', 'q', 'd', 's']
+
+    >>> encode_column(['qty', 1, 2])[::3]
+    ('b', [[0, 'qty']])
+
+    >>> encode_column([None, True, None])
+    ('c', None, b'', [[1, True]])
+
+    >>> encode_column([b'spam'])
+    Traceback (most recent call last):
+    ...
+    TypeError: cannot store bytes value in snapshot: b'spam'
+    """
+    first = values[0] if values else None
+    if type(first) in CONSTANT_TYPES and all(fits('c', v, first) for v in values):
+        return 'c', first, b'', []
+    counts = {t: sum(fits(t, v) for v in values) for t in 'qds'}
+    tag = max(counts, key=counts.get)
+    if not counts[tag]:  # e.g. only bool and None
+        tag = 'c'
+    elif tag == 'q':
+        ints = [v for v in values if fits('q', v)]
+        low, high = min(ints), max(ints)
+        tag = next(t for t, r in INT_RANGES.items() if low in r and high in r)
+    exceptions = []
+    for i, v in enumerate(values):
+        if type(v) not in CONSTANT_TYPES:
+            raise TypeError(f'cannot store {type(v).__name__} value in snapshot: {v!r}')
+        elif not fits(tag, v, first):
+            exceptions.append([i, v])
+    if tag == 'c':
+        return tag, first, b'', exceptions
+    if exceptions:
+        values = list(values)
+        for i, _ in exceptions:
+            values[i] = PLACEHOLDERS[tag]
+    if tag != 's':
+        return tag, None, array_bytes(tag, values), exceptions
+    encoded = [v.encode('utf-8') for v in values]
+    ends, end = [], 0
+    for e in encoded:
+        end += len(e)
+        ends.append(end)
+    typecode = 'I' if end < 2**32 else 'Q'
+    return tag, typecode, array_bytes(typecode, ends) + b''.join(encoded), exceptions
+
+
+def fits(tag: str, value, constant=None) -> bool:
+    """Return whether ``value`` can be stored in column array with ``tag``.
+
+    >>> fits('q', 1), fits('q', True), fits('q', 2**70), fits('b', 128), fits('c', None, None)
+    (True, False, False, False, True)
+    """
+    if tag == 'c':
+        return type(value) is type(constant) and value == constant
+    return (type(value) is type(PLACEHOLDERS[tag])
+            and (tag not in INT_RANGES or value in INT_RANGES[tag]))
+
+
+def decode_column(data: memoryview, nrows: int, tag: str, offset: int, size: int,
+                  extra, exceptions) -> list:
+    """Return list of ``nrows`` column values from the encoded column in ``data``."""
+    if tag == 'c':
+        result = [extra] * nrows
+    elif tag != 's':
+        result = array_from(tag, data[offset:offset + size]).tolist()
+    else:
+        result = decode_strings(data, nrows, offset, size, extra)
+    for i, v in exceptions:
+        result[i] = v
+    return result
+
+
+def decode_strings(data: memoryview, nrows: int, offset: int, size: int,
+                   typecode: str) -> list[str]:
+    blob = offset + ITEM[typecode].size * nrows
+    ends = array_from(typecode, data[offset:blob])
+    blob = data[blob:offset + size]
+    starts = [0]
+    starts += ends[:-1]
+    text = str(blob, 'utf-8')
+    if len(text) == len(blob):  # ASCII: byte offsets are string offsets
+        return [text[a:b] for a, b in zip(starts, ends)]
+    return [str(blob[a:b], 'utf-8') for a, b in zip(starts, ends)]
+
+
+def array_bytes(typecode: str, values) -> bytes:
+    result = array.array(typecode, values)
+    if SWAP:  # pragma: no cover
+        result.byteswap()
+    return result.tobytes()
+
+
+def array_from(typecode: str, data) -> array.array:
+    result = array.array(typecode)
+    result.frombytes(data)
+    if SWAP:  # pragma: no cover
+        result.byteswap()
+    return result
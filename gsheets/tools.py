@@ -1,11 +1,21 @@
 """Generic re-useable helpers."""
 
 import collections
+import contextvars
+import hashlib
+import json
+import threading
 
 __all__ = ['doctemplate',
            'list_view',
            'eval_source',
-           'uniqued']
+           'uniqued',
+           'dedupe_strings',
+           'digest_row',
+           'SingleFlight',
+           'submit']
+
+DIGEST_SIZE = 16
 
 
 def doctemplate(*args):
@@ -32,6 +42,8 @@ class list_view:  # noqa: N801
     ['spam']
     """
 
+    __slots__ = ('_items', '__weakref__')
+
     def __init__(self, items):
         self._items = items
 
@@ -106,3 +118,131 @@ def uniqued(iterable):
     """
     seen = set()
     return [item for item in iterable if item not in seen and not seen.add(item)]
+
+
+def dedupe_strings(rows, pool=None) -> dict:
+    """Replace (in-place) equal strings in nested list ``rows`` by one shared object.
+
+    >>> rows = [['spam', 1], [''.join(['sp', 'am']), 'eggs']]
+    >>> rows[0][0] is rows[1][0]
+    False
+
+    >>> pool = dedupe_strings(rows)
+    >>> rows, rows[0][0] is rows[1][0], sorted(pool)
+    ([['spam', 1], ['spam', 'eggs']], True, ['eggs', 'spam'])
+    """
+    if pool is None:
+        pool = {}
+    setdefault = pool.setdefault
+    for r in rows:
+        for i, value in enumerate(r):
+            if type(value) is str:
+                r[i] = setdefault(value, value)
+    return pool
+
+
+def digest_row(row, fill_value=None) -> bytes:
+    """Return stable digest of ``row`` values ignoring trailing ``fill_value`` cells.
+
+    >>> len(digest_row(['spam', 1, '', '']))
+    16
+
+    >>> digest_row(['spam', 1, '', ''], '') == digest_row(['spam', 1], '')
+    True
+
+    >>> digest_row([1]) == digest_row([1.0]) or digest_row([1]) == digest_row(['1'])
+    False
+
+    >>> spam = digest_row([b'spam'])
+    >>> spam == digest_row(['spam']) or spam == digest_row([b'eggs'])
+    False
+    """
+    end = len(row)
+    while end and row[end - 1] == fill_value:
+        end -= 1
+    data = dump_json(row[:end])
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+def dump_json(value) -> str:
+    """Return compact JSON of ``value`` encoding other objects by type and ``repr()``.
+
+    >>> print(dump_json(['spam', 1, b'eggs']))
+    ["spam",1,{"__type__":"builtins.bytes","repr":"b'eggs'"}]
+    """
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'),
+                      default=_json_fallback)
+
+
+def _json_fallback(value) -> dict:
+    cls = type(value)
+    return {'__type__': f'{cls.__module__}.{cls.__qualname__}', 'repr': repr(value)}
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with equal keys into one call sharing its result.
+
+    >>> flight = SingleFlight()
+    >>> flight.do('spam', str.upper, 'spam')
+    'SPAM'
+
+    >>> flight.stats()
+    {'calls': 1, 'merged': 0}
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._calls = 0
+        self._merged = 0
+
+    def do(self, key, func, /, *args, **kwargs):
+        """Return ``func(*args, **kwargs)`` or wait for the running call with ``key``.
+
+        Waiting callers get the result (or exception) of the running call.
+        """
+        import concurrent.futures
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = concurrent.futures.Future()
+                self._calls += 1
+                leader = True
+            else:
+                self._merged += 1
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self) -> dict[str, int]:
+        """Return the numbers of executed ``calls`` and of ``merged`` (waiting) calls."""
+        with self._lock:
+            return {'calls': self._calls, 'merged': self._merged}
+
+
+def submit(executor, func, /, *args, **kwargs):
+    """Return ``executor.submit(func, *args, **kwargs)`` running in a copy of the current context.
+
+    Propagates context variables (e.g. tracing and profiling) into worker threads.
+
+    >>> import concurrent.futures
+    >>> with concurrent.futures.ThreadPoolExecutor() as executor:
+    ...     submit(executor, str.upper, 'spam').result()
+    'SPAM'
+    """
+    context = contextvars.copy_context()
+    return executor.submit(context.run, func, *args, **kwargs)
@@ -0,0 +1,59 @@
+"""Optional tracing spans (OpenTelemetry) around fetching and export."""
+
+import contextlib
+
+__all__ = ['enable', 'disable', 'enabled', 'span']
+
+_tracer = None
+
+NULL_SPAN = contextlib.nullcontext()
+
+
+def enable(tracer=None) -> bool:
+    """Emit spans with ``tracer`` (default: the OpenTelemetry tracer if installed).
+
+    Args:
+        tracer: object with a ``start_as_current_span(name, attributes=...)``
+            method (e.g. ``opentelemetry.trace.Tracer``)
+    Returns:
+        bool: ``True`` if tracing is enabled, ``False`` if no tracer is given
+            and ``opentelemetry`` is not installed (no spans are emitted)
+    """
+    global _tracer
+    if tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            return False
+        from . import __version__
+        tracer = trace.get_tracer('gsheets', __version__)
+    _tracer = tracer
+    return True
+
+
+def disable() -> None:
+    """Stop emitting spans."""
+    global _tracer
+    _tracer = None
+
+
+def enabled() -> bool:
+    """Return if spans are emitted (see ``enable()``)."""
+    return _tracer is not None
+
+
+def span(name: str, **attributes):
+    """Return a context manager tracing its block as span ``name``.
+
+    Returns a no-op context manager unless tracing is enabled. Attribute
+    names are prefixed with ``'gsheets.'``, ``None`` values are skipped.
+
+    >>> with span('gsheets.fetch', spreadsheet_id='spam'):
+    ...     pass
+    """
+    tracer = _tracer
+    if tracer is None:
+        return NULL_SPAN
+    attributes = {f'gsheets.{key}': value for key, value in attributes.items()
+                  if value is not None}
+    return tracer.start_as_current_span(name, attributes=attributes)
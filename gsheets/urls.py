@@ -8,22 +8,35 @@ __all__ = ['SheetUrl']
 class SheetUrl:
     """URL for (the first or another) sheet of a Google docs spreadsheet."""
 
+    __slots__ = ('id', 'gid', '__weakref__')
+
     _pattern = re.compile(r'/spreadsheets/d/(?P<id>[a-zA-Z0-9-_]+)')
 
+    _gid_pattern = re.compile(r'[#&?]gid=(?P<gid>\d+)')
+
     _template = 'https://docs.google.com/spreadsheets/d/{id}/edit#gid={gid:d}'
 
     @classmethod
-    def from_string(cls, link):
+    def from_string(cls, link, *, default_gid: int | None = 0):
         """Return a new SheetUrl instance from parsed URL string.
 
         >>> SheetUrl.from_string('https://docs.google.com/spreadsheets/d/spam')
         <SheetUrl id='spam' gid=0>
+
+        >>> SheetUrl.from_string('https://docs.google.com/spreadsheets/d/spam/edit#gid=42')
+        <SheetUrl id='spam' gid=42>
+
+        >>> SheetUrl.from_string('https://docs.google.com/spreadsheets/d/spam',
+        ...                      default_gid=None).gid is None
+        True
         """
         ma = cls._pattern.search(link)
         if ma is None:
             raise ValueError(link)
         id = ma.group('id')
-        return cls(id)
+        ma = cls._gid_pattern.search(link)
+        gid = int(ma.group('gid')) if ma is not None else default_gid
+        return cls(id, gid)
 
     def __init__(self, id, gid: int = 0) -> None:
         """
@@ -38,7 +51,7 @@ class SheetUrl:
         self.gid = gid
 
     def __repr__(self) -> str:
-        return f'<{self.__class__.__name__} id={self.id!r} gid={self.gid:d}>'
+        return f'<{self.__class__.__name__} id={self.id!r} gid={self.gid!r}>'
 
     def to_string(self, gid: int | None = None) -> str:
         """
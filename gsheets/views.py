@@ -0,0 +1,176 @@
+"""Read-only windows on row-major cells without copying."""
+
+import copy
+
+from . import coordinates
+
+__all__ = ['CellsView', 'Window', 'RowView', 'ColView']
+
+
+class CellsView:
+    """Index access to zero-copy views on row-major cells via A1 notation.
+
+    >>> view = CellsView([[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+
+    >>> view['B2']
+    5
+
+    >>> view['A1':'B3']
+    <Window 3x2>
+
+    >>> view['B']
+    <ColView [2, 5, 8]>
+
+    >>> view['2':]
+    <Window 2x3>
+    """
+
+    def __init__(self, cells, *, title: str | None = None) -> None:
+        self._cells = cells
+        self._title = title
+
+    def __getitem__(self, index):
+        """Return the value or a read-only view of the given cell(s).
+
+        Args:
+            index (str): cell/row/col index ('A1', '2', 'B') or slice ('A1':'C3')
+        Returns:
+            value (cell), RowView/ColView (row, col), or Window (two-dimensional slice)
+        Raises:
+            TypeError: if ``index`` is not a string or slice of strings
+            ValueError: if ``index`` canot be parsed or has a sheet prefix
+                other than ``title``
+            IndexError: if ``index`` is out of range
+        """
+        if self._title is not None:
+            coordinates.check_sheet(index, self._title)
+        getter = coordinates.Coordinates.from_string(index)
+        row, col = getter.window()
+        cells = self._cells
+        if isinstance(row, int):
+            if isinstance(col, int):
+                return cells[row][col]
+            return RowView(cells[row], col)
+        rows = range(*row.indices(len(cells)))
+        if isinstance(col, int):
+            return ColView(cells, rows, col)
+        return Window(cells, rows, col)
+
+
+class Window:
+    """Read-only view on a rectangle of row-major cells.
+
+    >>> w = Window([[1, 2, 3], [4, 5, 6], [7, 8, 9]], range(1, 3), slice(0, 2))
+
+    >>> len(w), w.tolist()
+    (2, [[4, 5], [7, 8]])
+
+    >>> w[0], w[-1][1]
+    (<RowView [4, 5]>, 8)
+
+    >>> w[1:].tolist()
+    [[7, 8]]
+
+    >>> [r.tolist() for r in w]
+    [[4, 5], [7, 8]]
+    """
+
+    def __init__(self, cells, rows: range, cols: slice) -> None:
+        self._cells = cells
+        self._rows = rows
+        self._cols = cols
+
+    def __repr__(self) -> str:
+        ncols = max((len(r) for r in self), default=0)
+        return f'<{self.__class__.__name__} {len(self):d}x{ncols:d}>'
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self):
+        cells, cols = self._cells, self._cols
+        return (RowView(cells[i], cols) for i in self._rows)
+
+    def __getitem__(self, index):
+        """Return the row view at the given index or a window for the given slice."""
+        if isinstance(index, slice):
+            return self.__class__(self._cells, self._rows[index], self._cols)
+        return RowView(self._cells[self._rows[index]], self._cols)
+
+    def __eq__(self, other):
+        if isinstance(other, Window):
+            other = other.tolist()
+        if isinstance(other, list):
+            return self.tolist() == other
+        return NotImplemented
+
+    def tolist(self) -> list[list]:
+        """Return the values as new nested list (copy)."""
+        cells, cols = self._cells, self._cols
+        return [cells[i][cols] for i in self._rows]
+
+
+class _RangeView:
+
+    def __init__(self, items, indexes: range) -> None:
+        self._items = items
+        self._indexes = indexes
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__} {self.tolist()!r}>'
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __iter__(self):
+        return map(self._get, self._indexes)
+
+    def __getitem__(self, index):
+        """Return the value at the given index or a view for the given slice."""
+        if isinstance(index, slice):
+            result = copy.copy(self)
+            result._indexes = self._indexes[index]
+            return result
+        return self._get(self._indexes[index])
+
+    def __eq__(self, other):
+        if isinstance(other, _RangeView):
+            other = other.tolist()
+        if isinstance(other, list):
+            return self.tolist() == other
+        return NotImplemented
+
+    def tolist(self) -> list:
+        """Return the values as new list (copy)."""
+        return list(self)
+
+
+class RowView(_RangeView):
+    """Read-only view on (a range of) the cells of a row.
+
+    >>> r = RowView([1, 2, 3, 4], slice(1, None))
+
+    >>> len(r), r[0], r[-1], r[1:]
+    (3, 2, 4, <RowView [3, 4]>)
+    """
+
+    def __init__(self, row, cols: slice) -> None:
+        super().__init__(row, range(*cols.indices(len(row))))
+        self._get = row.__getitem__
+
+
+class ColView(_RangeView):
+    """Read-only view on (a range of) the cells of a column.
+
+    >>> c = ColView([[1, 2], [3, 4], [5, 6]], range(3), 1)
+
+    >>> len(c), c[0], c[-1], c[:2]
+    (3, 2, 6, <ColView [2, 4]>)
+    """
+
+    def __init__(self, cells, rows: range, col: int) -> None:
+        super().__init__(cells, rows)
+        self._col = col
+
+    def _get(self, index):
+        return self._items[index][self._col]
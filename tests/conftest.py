@@ -1,4 +1,11 @@
-import oauth2client
+import http.server
+import json
+import threading
+
+import httplib2
+import oauth2client.client
+import oauth2client.file
+import oauth2client.tools
 import pytest
 
 FILES = {'files': [{'id': 'spam', 'name': 'Spam'}]}
@@ -15,6 +22,17 @@ SPREADSHEET = {
 }
 
 
+QUERY_RESPONSE = {
+    'status': 'ok',
+    'table': {
+        'cols': [{'id': 'A', 'label': '', 'type': 'number'},
+                 {'id': 'B', 'label': '', 'type': 'string'}],
+        'rows': [{'c': [{'v': 3.0}, {'v': 'spam'}]},
+                 {'c': [{'v': 4.5}, None]}],
+    },
+}
+
+
 @pytest.fixture
 def open_(mocker):
     yield mocker.patch('builtins.open', mocker.mock_open())
@@ -119,3 +137,38 @@ def spreadsheet_values(services, spreadsheet):
         valueRenderOption='UNFORMATTED_VALUE',
         dateTimeRenderOption='FORMATTED_STRING')
     batchGet.return_value.execute.assert_called_once_with()
+
+
+@pytest.fixture
+def query_server(request, mocker, services):
+    """Local stand-in for the visualization query endpoint."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+
+        def do_GET(self):  # noqa: N802
+            server.requests.append(self.path)
+            status, payload = server.response
+            content = f'/*O_o*/\ngoogle.visualization.Query.setResponse({payload});'
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/javascript')
+            self.end_headers()
+            self.wfile.write(content.encode('utf-8'))
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.response = (200, json.dumps(getattr(request.module, 'QUERY_RESPONSE',
+                                               QUERY_RESPONSE)))
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+
+    host, port = server.server_address
+    mocker.patch('gsheets.backend.QUERY_URL',
+                 f'http://{host}:{port}/spreadsheets/d/{{id}}/gviz/tq')
+    services.sheets._http = httplib2.Http()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -1,3 +1,7 @@
+import concurrent.futures
+import threading
+import time
+
 import pytest
 
 import gsheets
@@ -46,6 +50,11 @@ def test_init_fail():
         gsheets.Sheets()
 
 
+def test_init_http_credentials_fail(mocker):
+    with pytest.raises(ValueError, match=r'mutually exclusive'):
+        gsheets.Sheets(mocker.sentinel.credentials, http=mocker.sentinel.http)
+
+
 def test_init_developer_key(mocker):
     sheets = gsheets.Sheets(developer_key=mocker.sentinel.developer_key)
 
@@ -102,6 +111,66 @@ def test_get_url(sheets):
     assert sheets.get(url).id == 'spam'
 
 
+@pytest.mark.usefixtures('spreadsheet_values')
+def test_get_fill_value(sheets):
+    assert sheets.get('spam', fill_value=None)[0].fill_value is None
+
+
+@pytest.fixture
+def spreadsheet_tabs(services):
+    spreadsheets = services.sheets.spreadsheets.return_value
+    spreadsheets.get.return_value.execute.return_value = {
+        'spreadsheetId': 'spam',
+        'properties': {'title': 'Spam'},
+        'sheets': [{'properties': {'title': f'Spam{i}', 'sheetId': i * 42, 'index': i}}
+                   for i in range(3)],
+    }
+    batchGet = spreadsheets.values.return_value.batchGet  # noqa: N806
+    batchGet.return_value.execute.return_value = {'valueRanges': [{'values': [[1]]}]}
+    yield batchGet
+
+
+@pytest.mark.parametrize('id_or_url, kwargs', [
+    ('spam', {'sheets': ['Spam1']}),
+    ('spam', {'sheets': [42]}),
+    ('https://docs.google.com/spreadsheets/d/spam/edit#gid=42', {}),
+])
+def test_get_sheets(sheets, spreadsheet_tabs, id_or_url, kwargs):
+    s = sheets.get(id_or_url, **kwargs)
+    assert s.sheets.titles() == ['Spam1']
+    assert s[42]['A1'] == 1
+    spreadsheet_tabs.assert_called_once()
+    assert spreadsheet_tabs.call_args.kwargs['ranges'] == ['Spam1']
+
+
+def test_get_render_options(sheets, spreadsheet_tabs):
+    sheets.get('spam', value_render_option='FORMULA',
+               date_time_render_option='SERIAL_NUMBER')
+    kwargs = spreadsheet_tabs.call_args.kwargs
+    assert kwargs['valueRenderOption'] == 'FORMULA'
+    assert kwargs['dateTimeRenderOption'] == 'SERIAL_NUMBER'
+
+
+def test_get_intern_strings(sheets, spreadsheet_tabs):
+    spreadsheet_tabs.return_value.execute.return_value = {'valueRanges': [
+        {'values': [['spam', ''.join(['sp', 'am'])]]},
+        {'values': [[''.join(['s', 'pam'])]]},
+    ]}
+    s = sheets.get('spam', sheets=['Spam0', 'Spam1'], intern_strings=True)
+    first, second = s.sheets
+    assert first['A1'] is first['B1'] is second['A1']
+
+
+def test_get_sheets_empty(sheets, spreadsheet_tabs):
+    assert len(sheets.get('spam', sheets=[])) == 0
+    spreadsheet_tabs.assert_not_called()
+
+
+def test_get_sheets_fail(sheets, spreadsheet_tabs):
+    with pytest.raises(KeyError):
+        sheets.get('spam', sheets=['Eggs'])
+
+
 @pytest.mark.usefixtures('spreadsheet_404')
 def test_get_fail(sheets):
     assert sheets.get('spam') is None
@@ -162,3 +231,248 @@ def test_titles(sheets):
 @pytest.mark.usefixtures('files')
 def test_titles_unique(sheets):
     assert sheets.titles(unique=True) == ['Spam']
+
+
+@pytest.fixture
+def spreadsheets_many(mocker, services):
+    fetched = []
+
+    def get(spreadsheetId):  # noqa: N803
+        fetched.append(spreadsheetId)
+        response = {'spreadsheetId': spreadsheetId,
+                    'properties': {'title': spreadsheetId.title()},
+                    'sheets': []}
+        return mocker.NonCallableMock(**{'execute.return_value': response})
+
+    services.sheets.spreadsheets.return_value.get.side_effect = get
+    yield fetched
+
+
+@pytest.mark.usefixtures('files', 'spreadsheet_values')
+def test_iter_prefetch(sheets):
+    (s,) = sheets.iter_prefetch()
+    assert s.id == 'spam' and s._service is None and s._api is sheets
+    assert s[0][:] == [[1, 2], [3, 4]]
+
+
+def test_iter_prefetch_ids(sheets, spreadsheets_many):
+    ids = [f'spam{i}' for i in range(10)]
+
+    assert [s.id for s in sheets.iter_prefetch(3, ids=ids)] == ids
+    assert sorted(spreadsheets_many) == ids
+
+
+def test_iter_prefetch_close(sheets, spreadsheets_many):
+    ids = (f'spam{i}' for i in range(100))
+
+    for s in sheets.iter_prefetch(2, ids=ids):
+        break
+
+    assert s.id == 'spam0'
+    assert len(spreadsheets_many) <= 3
+    assert next(ids) == 'spam3'
+
+
+@pytest.mark.usefixtures('spreadsheet_404')
+def test_iter_prefetch_fail(sheets):
+    with pytest.raises(KeyError):
+        list(sheets.iter_prefetch(ids=['spam']))
+
+
+def test_iter_prefetch_invalid(sheets):
+    with pytest.raises(ValueError, match=r'depth'):
+        next(sheets.iter_prefetch(0))
+
+
+@pytest.fixture
+def spreadsheet_blocking(mocker, services):
+    release = threading.Event()
+
+    def execute():
+        assert release.wait(5)
+        return {'spreadsheetId': 'spam', 'properties': {'title': 'Spam'}, 'sheets': []}
+
+    get = services.sheets.spreadsheets.return_value.get
+    get.return_value.execute.side_effect = execute
+    yield release, get.return_value.execute
+
+
+def wait_merged(sheets, merged):
+    for _ in range(500):
+        if sheets.coalescing_stats()['merged'] == merged:
+            return
+        time.sleep(0.01)
+    raise AssertionError('timeout')  # pragma: no cover
+
+
+def test_fetch_coalescing(sheets, spreadsheet_blocking):
+    release, execute = spreadsheet_blocking
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(sheets.__getitem__, 'spam') for _ in range(4)]
+        wait_merged(sheets, 3)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results[0].id == 'spam'
+    assert all(r is results[0] for r in results)
+    execute.assert_called_once_with()
+    assert sheets.coalescing_stats() == {'calls': 1, 'merged': 3}
+
+    assert sheets.get('spam') is not results[0]
+    assert sheets.coalescing_stats() == {'calls': 2, 'merged': 3}
+
+
+def test_fetch_coalescing_defaults(sheets, spreadsheet_blocking):
+    release, execute = spreadsheet_blocking
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(sheets.__getitem__, 'spam'),
+                   executor.submit(sheets.get, 'spam'),
+                   executor.submit(sheets.get, 'spam', fill_value=''),
+                   executor.submit(sheets.get, 'spam', fill_value=None)]
+        wait_merged(sheets, 2)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results[0] is results[1] is results[2]
+    assert results[3] is not results[0]
+    assert execute.call_count == 2
+    assert sheets.coalescing_stats() == {'calls': 2, 'merged': 2}
+
+
+def test_fetch_coalescing_fail(mocker, sheets, spreadsheet_blocking):
+    release, execute = spreadsheet_blocking
+    execute.side_effect = lambda: release.wait(5) and 1 / 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(sheets.get, 'spam') for _ in range(2)]
+        wait_merged(sheets, 1)
+        release.set()
+        for f in futures:
+            with pytest.raises(ZeroDivisionError):
+                f.result()
+
+    assert sheets.coalescing_stats() == {'calls': 1, 'merged': 1}
+
+
+class Batch:
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            try:
+                response = request.execute()
+            except Exception as e:
+                self.callback(request_id, None, e)
+            else:
+                self.callback(request_id, response, None)
+
+
+@pytest.fixture
+def spreadsheets_batch(mocker, services):
+    from apiclient.errors import HttpError
+
+    def get(spreadsheetId):  # noqa: N803
+        request = mocker.NonCallableMock()
+        if spreadsheetId in ('missing', 'broken'):
+            status = 404 if spreadsheetId == 'missing' else 500
+            error = HttpError(resp=mocker.NonCallableMock(status=status), content=b'')
+            request.execute.side_effect = error
+        else:
+            request.execute.return_value = {
+                'spreadsheetId': spreadsheetId,
+                'properties': {'title': spreadsheetId.title()},
+                'sheets': [{'properties': {'title': f'{spreadsheetId}{i}',
+                                           'sheetId': i, 'index': i}}
+                           for i in range(2)]}
+        return request
+
+    def batchGet(spreadsheetId, ranges, **kwargs):  # noqa: N802, N803
+        request = mocker.NonCallableMock()
+        if spreadsheetId == 'invalid':
+            request.execute.side_effect = ValueError(spreadsheetId)
+        else:
+            request.execute.return_value = {'valueRanges': [{'values': [[r]]}
+                                                            for r in ranges]}
+        return request
+
+    batches = []
+
+    def new_batch_http_request(callback):
+        batches.append(Batch(callback))
+        return batches[-1]
+
+    spreadsheets = services.sheets.spreadsheets.return_value
+    spreadsheets.get.side_effect = get
+    spreadsheets.values.return_value.batchGet.side_effect = batchGet
+    services.sheets.new_batch_http_request.side_effect = new_batch_http_request
+    yield batches
+
+
+def test_get_many(sheets, spreadsheets_batch):
+    ids = ['spam', 'https://docs.google.com/spreadsheets/d/eggs/edit#gid=1',
+           'missing', 'broken', 'invalid', 'spam']
+
+    result = sheets.get_many(ids, batch_size=2)
+
+    assert list(result) == ['spam', 'eggs', 'missing', 'broken', 'invalid']
+    assert [len(b.requests) for b in spreadsheets_batch] == [2, 2, 1]
+
+    spam, eggs = result['spam'], result['eggs']
+    assert [s.title for s in spam] == ['spam0', 'spam1']
+    assert spam[1][:] == [['spam1']] and spam._api is sheets and spam._service is None
+    assert [s.title for s in eggs] == ['eggs1']
+
+    assert isinstance(result['missing'], KeyError)
+    assert result['broken'].resp.status == 500
+    assert isinstance(result['invalid'], ValueError)
+
+
+def test_get_many_empty(sheets, services):
+    assert sheets.get_many([]) == {}
+    services.sheets.new_batch_http_request.assert_not_called()
+
+
+@pytest.mark.usefixtures('spreadsheet_values')
+def test_stats(sheets):
+    calls, events = [], []
+    sheets.on_request(lambda event: calls.append((event.operation, event.status)))
+
+    @sheets.on_response
+    def on_response(event):
+        events.append(event)
+
+    assert callable(on_response)
+
+    sheets['spam']
+
+    stats = sheets.stats()
+    assert list(stats) == ['spreadsheets.get', 'values.batchGet']
+    assert stats['spreadsheets.get']['requests'] == 1
+    assert stats['values.batchGet']['cells'] == 4
+    assert stats['values.batchGet']['statuses'] == {200: 1}
+    assert calls == [('spreadsheets.get', None), ('values.batchGet', None)]
+    assert [(e.operation, e.status) for e in events] == [('spreadsheets.get', 200),
+                                                         ('values.batchGet', 200)]
+    assert events[-1].attrs == {'spreadsheet_id': 'spam', 'ranges': 1}
+    assert events[-1].seconds >= 0 and events[-1].error is None
+    assert repr(events[-1]).startswith('<RequestEvent values.batchGet status=200 ')
+
+    text = sheets.stats_to_prometheus()
+    assert 'gsheets_requests_total{operation="values.batchGet",status="200"} 1\n' in text
+    assert 'gsheets_response_cells_total{operation="values.batchGet"} 4\n' in text
+
+
+@pytest.mark.usefixtures('spreadsheet_404')
+def test_stats_fail(sheets):
+    assert sheets.get('spam') is None
+
+    stats = sheets.stats()['spreadsheets.get']
+    assert stats['errors'] == 1 and stats['statuses'] == {404: 1}
@@ -1,5 +1,10 @@
+import json
+import subprocess
+import sys
+
 import pytest
 
+import gsheets
 from gsheets import backend
 
 
@@ -38,3 +43,94 @@ def test_iterfiles_nomime(services):
     list_.assert_called_once_with(orderBy='folder,name,createdTime',
                                   pageToken=None)
     list_.return_value.execute.assert_called_once_with()
+
+
+def test_query(services, query_server):
+    rows = backend.query(services.sheets, 'spam', 0, 'select A, B where A > 1')
+
+    assert rows == [[3, 'spam'], [4.5, None]]
+    path, = query_server.requests
+    assert path == ('/spreadsheets/d/spam/gviz/tq'
+                    '?tqx=out%3Ajson&gid=0&tq=select+A%2C+B+where+A+%3E+1')
+
+
+def test_query_headers(services, query_server):
+    backend.query(services.sheets, 'spam', 0, 'select A', headers=1)
+
+    assert query_server.requests[0].endswith('&headers=1')
+
+
+def test_query_invalid(services, query_server):
+    errors = [{'reason': 'invalid_query', 'message': 'Invalid query',
+               'detailed_message': 'PARSE_ERROR: spam'}]
+    query_server.response = (200, json.dumps({'status': 'error', 'errors': errors}))
+
+    with pytest.raises(ValueError, match=r'PARSE_ERROR: spam'):
+        backend.query(services.sheets, 'spam', 0, 'spam')
+
+
+@pytest.mark.parametrize('status, exception', [(404, KeyError),
+                                               (500, backend.apiclient.errors.HttpError)])
+def test_query_fail(services, query_server, status, exception):
+    query_server.response = (status, '{}')
+
+    with pytest.raises(exception):
+        backend.query(services.sheets, 'spam', 0, 'select A')
+
+
+def test_parse_query_response_invalid():
+    with pytest.raises(ValueError, match=r'invalid query response'):
+        backend.parse_query_response('<html>')
+
+
+def test_execute_retries(mocker):
+    from googleapiclient.http import HttpMockSequence, HttpRequest
+    from googleapiclient.model import JsonModel
+
+    from gsheets.metrics import Metrics
+
+    service = mocker.NonCallableMock(name='service')
+    metrics = backend.METRICS[service] = Metrics(num_retries=1)
+    http = HttpMockSequence([({'status': '503'}, b''),
+                             ({'status': '200'}, b'{"valueRanges": [{"values": [[1, 2]]}]}')])
+    request = HttpRequest(http, JsonModel().response, 'https://example.com/spam',
+                          methodId='sheets.spreadsheets.values.batchGet')
+    request._sleep = lambda seconds: None
+
+    with gsheets.profile() as p:
+        result = backend.execute(service, request, 'values.batchGet')
+
+    assert result == {'valueRanges': [{'values': [[1, 2]]}]}
+    stats = metrics.stats()['values.batchGet']
+    assert stats['retries'] == 1 and stats['cells'] == 2 and stats['bytes'] == 39
+    assert stats['statuses'] == {200: 1}
+    assert backend.CountingHttp(http, None).follow_redirects is http.follow_redirects
+    assert set(p.stats()) == {('request values.batchGet',),
+                              ('request values.batchGet', 'json')}
+
+
+def test_lazy_import():
+    modules = ('googleapiclient', 'oauth2client', 'concurrent.futures', 'logging', 'sqlite3')
+    code = f'import sys, gsheets; print(*[m for m in {modules!r} if m in sys.modules])'
+    proc = subprocess.run([sys.executable, '-c', code],
+                          capture_output=True, text=True, check=True)
+
+    assert proc.stdout.split() == []
+
+
+def test_getattr_fail():
+    with pytest.raises(AttributeError, match=r'spam'):
+        backend.spam
+
+    with pytest.raises(AttributeError, match=r'spam'):
+        gsheets.oauth2.spam
+
+
+def test_lazy_module(monkeypatch):
+    import oauth2client.client
+
+    monkeypatch.delitem(vars(gsheets.oauth2), 'client', raising=False)
+
+    assert gsheets.oauth2._lazy_module('client') is oauth2client.client
+    assert vars(gsheets.oauth2)['client'] is oauth2client.client
+    assert backend.apiclient.errors.HttpError
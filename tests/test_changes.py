@@ -0,0 +1,84 @@
+import pytest
+
+import gsheets
+from gsheets.models import SpreadSheet, WorkSheet
+
+
+def make_sheet(*sheets):
+    return SpreadSheet('spam', 'Spam', [WorkSheet(id, title, i, values)
+                                        for i, (id, title, values) in enumerate(sheets)],
+                       None)
+
+
+def test_diff_unchanged():
+    old = make_sheet((0, 'Spam', [[1, 2], [3, 4]]))
+    new = make_sheet((0, 'Spam', [[1, 2], [3, 4]]))
+
+    d = gsheets.diff(old, new)
+
+    assert not d
+    assert (d.added, d.removed, d.renamed, d.changed) == ([], [], [], [])
+    with pytest.raises(KeyError):
+        d['Spam']
+
+
+def test_diff_tabs():
+    old = make_sheet((0, 'Spam', [[1]]), (1, 'Eggs', [[2]]))
+    new = make_sheet((0, 'Ham', [[1]]), (2, 'Eggs', [[2]]))
+
+    d = gsheets.diff(old, new)
+
+    assert d
+    assert [s.id for s in d.added] == [2]
+    assert [s.id for s in d.removed] == [1]
+    assert d.renamed == [('Spam', 'Ham')]
+    assert d.changed == []
+
+
+def test_diff_rows():
+    old = WorkSheet(0, 'Spam', 0, [[str(i), i] for i in range(100)])
+    values = [[str(i), i] for i in range(100)]
+    values[10:10] = [['new', -1], ['new', -2]]
+    del values[52:55]
+    values[80][1] = 'changed'
+    new = WorkSheet(0, 'Spam', 0, values)
+
+    d = gsheets.diff(old, new)
+
+    assert d.inserted == ['11:12']
+    assert d.deleted == ['51:53']
+    assert d.changed == ['B81']
+    assert list(d.cells()) == [('B81', 81, 'changed')]
+
+
+def test_diff_ragged():
+    old = WorkSheet(0, 'Spam', 0, [['a'], ['b'], ['c']])
+    new = WorkSheet(0, 'Spam', 0, [['x', 'y'], ['a'], ['b'], ['d', 'e']])
+
+    d = gsheets.diff(old, new)
+
+    assert d.inserted == ['1:1']
+    assert d.deleted == []
+    assert d.changed == ['A4:B4']
+    assert list(d.cells()) == [('A4', 'c', 'd'), ('B4', '', 'e')]
+
+
+def test_diff_narrower():
+    old = WorkSheet(0, 'Spam', 0, [['a', 'b'], ['c', 'd']])
+    new = WorkSheet(0, 'Spam', 0, [['a'], ['e']])
+
+    assert list(gsheets.diff(old, new).cells()) == [('B1', 'b', ''),
+                                                    ('A2', 'c', 'e'),
+                                                    ('B2', 'd', '')]
+
+
+def test_diff_non_json():
+    old = WorkSheet(0, 'Spam', 0, [[b'a', 1], [b'b', 2]])
+    new = WorkSheet(0, 'Spam', 0, [[b'a', 1], [b'c', 2]])
+
+    assert list(gsheets.diff(old, new).cells()) == [('A2', b'b', b'c')]
+
+
+def test_diff_invalid():
+    with pytest.raises(TypeError, match=r'need two'):
+        gsheets.diff(make_sheet(), WorkSheet(0, 'Spam', 0, []))
@@ -1,3 +1,7 @@
+import datetime
+import sqlite3
+import weakref
+
 import pytest
 
 import gsheets
@@ -21,7 +25,7 @@ def ws(sheet):
 
 @pytest.fixture
 def ws_nonascii(ws):
-    ws._values = [['Sp\xe4m', 'Eggs'], [None, 1]]
+    ws._load([['Sp\xe4m', 'Eggs'], [None, 1]])
     yield ws
 
 
@@ -30,6 +34,12 @@ class TestSpreadSheet:
     def test_repr(self, sheet):
         assert repr(sheet) == "<SpreadSheet spam 'Spam'>"
 
+    def test_slots(self, sheet):
+        assert not hasattr(sheet, '__dict__')
+        assert not hasattr(sheet.sheets, '__dict__')
+        assert weakref.ref(sheet)() is sheet
+        assert weakref.ref(sheet.sheets)() is not None
+
     def test_eq(self, sheet):
         assert sheet == sheet
 
@@ -95,6 +105,30 @@ class TestSpreadSheet:
     def test_findall_all(self, sheet):
         assert sheet.findall(None) == [sheet[0]]
 
+    @pytest.mark.parametrize('value, lookup', [
+        (None, {'metadataKey': 'spam'}),
+        ('eggs', {'metadataKey': 'spam', 'metadataValue': 'eggs'}),
+    ])
+    def test_values_by_metadata(self, services, sheet, value, lookup):
+        values = services.sheets.spreadsheets.return_value.values.return_value
+        by_filter = values.batchGetByDataFilter
+        by_filter.return_value.execute.return_value = {
+            'spreadsheetId': 'spam',
+            'valueRanges': [{'valueRange': {'range': "'Spam1'!A1:B1", 'values': [[1, 2]]},
+                             'dataFilters': []},
+                            {'valueRange': {'range': "'Spam1'!A3:B3"}}],
+        }
+
+        result = sheet.values_by_metadata('spam', value)
+
+        assert result == {"'Spam1'!A1:B1": [[1, 2]], "'Spam1'!A3:B3": []}
+        by_filter.assert_called_once_with(
+            spreadsheetId='spam',
+            body={'dataFilters': [{'developerMetadataLookup': lookup}],
+                  'majorDimension': 'ROWS',
+                  'valueRenderOption': 'UNFORMATTED_VALUE',
+                  'dateTimeRenderOption': 'FORMATTED_STRING'})
+
     def test_sheets(self, sheet):
         assert isinstance(sheet.sheets, gsheets.models.SheetsView)
 
@@ -118,6 +152,12 @@ class TestSpreadSheet:
         sheet.to_csv(**kwargs)
         ws.to_csv.assert_called_once_with(None, **kwargs)
 
+    def test_to_sqlite(self, tmp_path, sheet):
+        path = tmp_path / 'spam.sqlite3'
+        sheet.to_sqlite(path)
+        with sqlite3.connect(path) as conn:
+            assert conn.execute('SELECT * FROM Spam1').fetchall() == [(3, 4)]
+
 
 class TestSheetsView:
 
@@ -149,12 +189,50 @@ class TestWorkSheet:
     def test_repr(self, ws):
         assert repr(ws) == "<WorkSheet 0 'Spam1' (2x2)>"
 
+    def test_slots(self, ws):
+        assert not hasattr(ws, '__dict__')
+        assert weakref.ref(ws)() is ws
+
     def test_eq_fail(self, ws):
         assert not ws == ws.values()
 
     def test_ne_fail(self, ws):
         assert ws != ws.values()
 
+    def test_eq_digest(self, ws):
+        other = gsheets.models.WorkSheet(1, 'Eggs', 1, ws.values())
+
+        assert ws == other and not ws != other
+        assert ws.digest == other.digest and ws.row_digests == other.row_digests
+
+        other._load([['spam', 'eggs'], ['ham', 'spam']])
+
+        assert ws != other and not ws == other
+        assert ws.row_digests[0] != other.row_digests[0]
+
+    def test_digest(self, ws):
+        digest = ws.digest
+
+        assert isinstance(digest, str) and len(digest) == 32
+        assert ws.digest is digest
+        assert len(ws.row_digests) == ws.nrows
+
+        ws._load([[]])
+
+        assert ws.digest != digest
+
+    def test_digest_non_json(self):
+        missing = object()
+
+        def make(values):
+            return gsheets.models.WorkSheet(0, 'Spam', 0, values, fill_value=missing)
+
+        ws = make([[b'spam', 1], [b'eggs']])
+
+        assert ws == make([[b'spam', 1], [b'eggs', missing]])
+        assert ws != make([[b'spam', 1], [b'ham']])
+        assert ws != make([['spam', 1], [b'eggs']])
+
     def test_getitem(self, ws):
         assert ws[:] == [[1, 2], [3, 4]]
 
@@ -162,6 +240,20 @@ class TestWorkSheet:
         with pytest.raises(IndexError):
             ws['Z23']
 
+    def test_getitem_multiletter(self, ws):
+        ws._load([list(range(30)), list(range(30, 60))])
+        assert ws['AB2'] == ws['$AB$2'] == ws["'Spam1'!AB2"] == 57
+        assert ws['AC':'AD'] == [[28, 29], [58, 59]]
+
+    @pytest.mark.parametrize('index', ["'Other'!A2", 'Nope!B3', slice('A1', 'Nope!B2')])
+    def test_getitem_other_sheet(self, ws, index):
+        with pytest.raises(ValueError, match=r'refers to sheet'):
+            ws[index]
+        with pytest.raises(ValueError, match=r'refers to sheet'):
+            ws.view[index]
+        with pytest.raises(ValueError, match=r'refers to sheet'):
+            ws.get_many(['A1', index])
+
     def test_getitem_invalid(self, ws):
         with pytest.raises(ValueError):
             ws['spam']
@@ -181,9 +273,106 @@ class TestWorkSheet:
         with pytest.raises(IndexError):
             ws.at(23, 23)
 
+    def test_get_many(self, ws):
+        keys = ['B2', 'A1', 'Z23', '2', slice('A', 'B'), 'B', 'A2']
+        assert ws.get_many(keys, default='spam') == [4, 1, 'spam', [3, 4],
+                                                     [[1, 2], [3, 4]], [2, 4], 3]
+
+    def test_get_many_ragged(self, ws):
+        ws._load([[1, 2], [3]])
+        assert ws.get_many(['B', 'B1', 'C1', '23']) == [[2, ''], 2, None, None]
+
+    def test_get_many_invalid(self, ws):
+        with pytest.raises(ValueError):
+            ws.get_many(['A1', 'spam'])
+
+    def test_gather(self, ws):
+        assert ws.gather([(1, 1), (0, 0), (1, 0), (0, 23), (23, 0)],
+                         default='spam') == [4, 1, 3, 'spam', 'spam']
+
+    def test_gather_negative(self, ws):
+        assert ws.gather([(-1, 0), (0, -1), (1, 1)], default='spam') == ['spam', 'spam', 4]
+
+    def test_gather_invalid(self, ws):
+        with pytest.raises(TypeError):
+            ws.gather([('A', '1')])
+        with pytest.raises(TypeError):
+            ws.gather([(0, '1')])
+
     def test_values(self, ws):
         assert ws.values() == [[1, 2], [3, 4]]
 
+    def test_query(self, ws, query_server):
+        assert ws.query('select A, B where A > 1') == [[3, 'spam'], [4.5, '']]
+        assert query_server.requests[0].startswith('/spreadsheets/d/spam/gviz/tq?')
+
+        stats = ws.spreadsheet._api.stats()['gviz.query']
+        assert stats['statuses'] == {200: 1} and stats['bytes'] > 0
+
+    def test_records(self, ws):
+        ws._load([['sku', 'class', 'sku'], ['X-42', 'spam', 1], ['X-23', 'eggs']])
+        records = list(ws.records())
+        assert records == [('X-42', 'spam', 1), ('X-23', 'eggs', '')]
+        assert records[0]._fields == ('sku', '_1', '_2')
+        assert records[0].sku == 'X-42'
+
+    def test_records_dates(self, ws):
+        ws._load([['day', 'qty'], [44197, 1], ['', 2]])
+        records = list(ws.records(dates=['day']))
+        assert [r.day for r in records] == [datetime.datetime(2021, 1, 1), '']
+        assert ws._values[1] == [44197, 1]
+
+    def test_records_noheader(self, ws):
+        assert [r.B for r in ws.records(header=None)] == [2, 4]
+
+    def test_lookup(self, ws):
+        ws._load([['sku', 'qty'], ['X-42', 1], ['X-23', 2], ['X-42', 3]])
+        assert ws.lookup('sku', 'X-42').qty == 1
+        assert ws.lookup(1, 2).sku == 'X-23'
+        assert ws.lookup('sku', 'X-99') is None
+        assert ws.index_on('sku') is ws.index_on('sku')
+        assert dict(ws.index_on('sku')) == {'X-42': 1, 'X-23': 2}
+
+    def test_lookup_reload(self, ws):
+        ws._load([['sku'], ['X-42']])
+        assert ws.lookup('sku', 'X-42') == ('X-42',)
+        ws._load([['sku'], ['X-23']])
+        assert ws.lookup('sku', 'X-42') is None
+
+    def test_lookup_invalid(self, ws):
+        with pytest.raises(KeyError):
+            ws.lookup('spam', 'X-42')
+
+    @pytest.mark.parametrize('header', [0, -1])
+    def test_records_header_invalid(self, ws, header):
+        with pytest.raises(ValueError, match=r'one-based'):
+            ws.records(header=header)
+        with pytest.raises(ValueError, match=r'one-based'):
+            ws.lookup(0, 3, header=header)
+
+    @pytest.mark.parametrize('index', ['A1', 'B', '2', slice(None), slice('A1', 'B1'),
+                                       slice('A1', 'A2'), slice('B2', 'A1'),
+                                       slice('A2', None), slice(None, 'B1'),
+                                       slice('B', None), slice(None, 'A'),
+                                       slice(None, '1')])
+    def test_view(self, ws, index):
+        result = ws.view[index]
+        assert result == ws[index]
+        if isinstance(result, (int, list)):
+            return
+        assert result.tolist() == ws[index]
+        assert len(result) == len(ws[index])
+        assert list(result)[:1] == ws[index][:1]
+
+    def test_view_nocopy(self, ws):
+        ws._load([[1, 2], [3, 4]])
+        window = ws.view[:]
+        ws._values[1][1] = 'spam'
+        assert window[1][1] == 'spam'
+        assert window[1:] == [[3, 'spam']] and window != object()
+        assert window == ws.view['A1':'B2'] and window[1:] != window
+        assert ws.view['B'] == ws.view['B1':'B2'] and ws.view['B'] != object()
+
     def test_values_column_major(self, ws):
         assert ws.values(column_major=True) == [[1, 3], [2, 4]]
 
@@ -205,6 +394,20 @@ class TestWorkSheet:
     def test_ncells(self, ws):
         assert ws.ncells == 4
 
+    def test_shape(self, ws):
+        assert ws.shape == (ws.nrows, ws.ncols) == (2, 2)
+
+    def test_ragged(self):
+        ws = gsheets.models.WorkSheet(0, 'Spam', 0, [['spam'], [], [1, 2, 3]],
+                                      fill_value=None)
+        assert ws.shape == (3, 3) and ws.fill_value is None
+        assert ws['C'] == [None, None, 3]
+        assert ws.values(column_major=True)[1] == [None, None, 2]
+
+    def test_empty(self):
+        ws = gsheets.models.WorkSheet(0, 'Spam', 0, [[]])
+        assert ws.shape == (1, 0) and ws.ncells == 0
+
     def test_to_csv(self, mocker, open_, ws):
         ws.to_csv(make_filename=None)
         open_.assert_called_once_with('Spam - Spam1.csv', 'w',
@@ -239,8 +442,100 @@ class TestWorkSheet:
         assert mf.kwargs['fd_getvalue'] == '1,2\r\n3,4\r\n'
         assert mf.name == 'Spam1'
 
+    def test_to_frame_dates(self, mocker, pandas, ws):
+        df = mocker.MagicMock()
+        pandas.read_csv.side_effect = None
+        pandas.read_csv.return_value = df
+        assert ws.to_frame(dates=['1']) is df
+        pandas.to_datetime.assert_called_once_with(df.__getitem__.return_value,
+                                                   unit='D',
+                                                   origin=pandas.Timestamp.return_value)
+        pandas.Timestamp.assert_called_once_with(datetime.datetime(1899, 12, 30))
+        df.__setitem__.assert_called_once_with('1', pandas.to_datetime.return_value)
+
     def test_to_frame_nonascii(self, mocker, pandas, ws_nonascii):
         mf = ws_nonascii.to_frame(assign_name=True)
         pandas.read_csv.assert_called_once_with(mocker.ANY, dialect='excel')
         assert mf.kwargs['fd_getvalue'] == 'Sp\xe4m,Eggs\r\n,1\r\n'
         assert mf.name == 'Spam1'
+
+    def test_to_sqlite(self, ws):
+        conn = sqlite3.connect(':memory:')
+        assert ws.to_sqlite(conn) == 1
+        sql, = conn.execute('SELECT sql FROM sqlite_master').fetchone()
+        assert sql == 'CREATE TABLE "Spam1" ("1" INTEGER, "2" INTEGER)'
+        assert conn.execute('SELECT * FROM Spam1').fetchall() == [(3, 4)]
+
+    def test_to_sqlite_ragged(self, ws):
+        ws._load([['spam', 'eggs'], [1.5], ['ham', 2, 'extra']])
+        conn = sqlite3.connect(':memory:')
+        assert ws.to_sqlite(conn, 'spam', batch_size=1) == 2
+        assert conn.execute('SELECT * FROM spam').fetchall() == [('1.5', None, None),
+                                                                 ('ham', 2, 'extra')]
+
+    @pytest.mark.parametrize('if_exists, expected', [('replace', [(3, 4)]),
+                                                     ('append', [(3, 4), (3, 4)])])
+    def test_to_sqlite_exists(self, ws, if_exists, expected):
+        conn = sqlite3.connect(':memory:')
+        ws.to_sqlite(conn, header=False)
+        ws.to_sqlite(conn, if_exists=if_exists)
+        assert conn.execute('SELECT * FROM Spam1').fetchall()[-len(expected):] == expected
+
+    def test_to_sqlite_exists_fail(self, ws):
+        conn = sqlite3.connect(':memory:')
+        ws.to_sqlite(conn)
+        with pytest.raises(ValueError, match=r'already exists'):
+            ws.to_sqlite(conn)
+        assert conn.execute('SELECT count(*) FROM Spam1').fetchone() == (1,)
+
+    def test_to_sqlite_open_transaction(self, ws):
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE log (msg)')
+        conn.commit()
+        conn.execute("INSERT INTO log VALUES ('spam')")
+        with pytest.raises(ValueError, match=r'already exists'):
+            ws.to_sqlite(conn, 'log')
+        assert ws.to_sqlite(conn) == 1
+        assert conn.in_transaction
+        conn.rollback()
+        assert conn.execute('SELECT * FROM log').fetchall() == []
+        assert conn.execute("SELECT * FROM sqlite_master WHERE name = 'Spam1'").fetchall() == []
+
+    def test_to_sqlite_rollback(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE log (msg)')
+        conn.execute("INSERT INTO log VALUES ('spam')")
+        rows = iter([['spam'], [1], ['eggs', 'extra']])
+        with pytest.raises(ValueError, match=r'beyond 1 columns'):
+            gsheets.export.write_sqlite(conn, 'spam', rows, infer_rows=1, batch_size=1)
+        assert conn.execute('SELECT * FROM log').fetchall() == [('spam',)]
+        assert conn.execute("SELECT * FROM sqlite_master WHERE name = 'spam'").fetchall() == []
+
+    def test_to_sqlite_fill_value(self):
+        values = [['spam', 'eggs'], [1, 0], ['', 2], [False, 0.0], [3]]
+        ws = gsheets.models.WorkSheet(0, 'Spam1', 0, values, fill_value=0)
+        conn = sqlite3.connect(':memory:')
+        ws.to_sqlite(conn)
+        sql, = conn.execute('SELECT sql FROM sqlite_master').fetchone()
+        assert sql == 'CREATE TABLE "Spam1" ("spam" INTEGER, "eggs" REAL)'
+        assert conn.execute('SELECT * FROM Spam1').fetchall() == [(1, 0), (None, 2),
+                                                                  (0, 0.0), (3, 0)]
+
+    @pytest.mark.parametrize('if_exists, expected', [('replace', [(3, 4)]),
+                                                     ('append', [(1, 2), (3, 4), (3, 4)])])
+    def test_to_sqlite_exists_nocase(self, ws, if_exists, expected):
+        conn = sqlite3.connect(':memory:')
+        ws.to_sqlite(conn, 'SPAM', header=False)
+        assert ws.to_sqlite(conn, 'spam', if_exists=if_exists) == 1
+        assert conn.execute('SELECT * FROM spam').fetchall() == expected
+        with pytest.raises(ValueError, match=r'already exists'):
+            ws.to_sqlite(conn, 'Spam')
+
+    def test_to_sqlite_invalid(self, ws):
+        with pytest.raises(ValueError, match=r'if_exists'):
+            ws.to_sqlite(sqlite3.connect(':memory:'), if_exists='spam')
+
+    def test_to_sqlite_empty(self, ws):
+        ws._load([[]])
+        with pytest.raises(ValueError, match=r'no columns'):
+            ws.to_sqlite(sqlite3.connect(':memory:'))
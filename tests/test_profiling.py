@@ -0,0 +1,58 @@
+import io
+
+import pytest
+
+import gsheets
+from gsheets import profiling
+
+
+@pytest.mark.usefixtures('spreadsheet_values')
+def test_profile(mocker, open_):
+    sheets = gsheets.Sheets(credentials=mocker.sentinel.credentials)
+
+    with gsheets.profile() as p:
+        sheet = sheets['spam']
+        sheet[0].to_csv()
+
+    stats = p.stats()
+    assert set(stats) == {('spreadsheet spam',),
+                          ('spreadsheet spam', 'discovery'),
+                          ('spreadsheet spam', 'request spreadsheets.get'),
+                          ('spreadsheet spam', 'request values.batchGet'),
+                          ('spreadsheet spam', 'worksheet Spam1'),
+                          ('spreadsheet spam', 'worksheet Spam1', 'model'),
+                          ('worksheet Spam1',),
+                          ('worksheet Spam1', 'export csv')}
+    calls, wall, cpu = stats['spreadsheet spam',]
+    assert calls == 1 and wall >= stats['spreadsheet spam', 'worksheet Spam1'][1]
+
+    out = io.StringIO()
+    p.print_report(file=out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].split() == ['wall', 'cpu', 'calls', 'phase']
+    assert lines[1].endswith('  spreadsheet spam') or lines[1].endswith('  worksheet Spam1')
+    assert len(lines) == 1 + len(stats)
+    assert any(line.endswith('      model') for line in lines)
+
+
+def test_profile_inactive():
+    assert not profiling.active()
+    assert profiling.phase('spam') is profiling.NULL_PHASE
+
+    with profiling.phase('spam'):
+        pass
+
+    with gsheets.profile():
+        assert profiling.active()
+        assert profiling.phase('spam') is not profiling.NULL_PHASE
+
+    assert not profiling.active()
+
+
+def test_timed():
+    func = profiling.timed('spam', lambda x: x * 2)
+
+    with gsheets.profile() as p:
+        assert func(21) == 42
+
+    assert list(p.stats()) == [('spam',)]
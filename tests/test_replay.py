@@ -0,0 +1,156 @@
+import email
+import json
+import urllib.parse
+
+import httplib2
+import pytest
+
+import gsheets
+from gsheets import replay
+
+SPREADSHEET = {'spreadsheetId': 'spam',
+               'properties': {'title': 'Spam'},
+               'sheets': [{'properties': {'title': 'Spam1', 'sheetId': 0, 'index': 0}}]}
+
+RESPONSES = {'/drive/v3/files': {'files': [{'id': 'spam', 'name': 'Spam'}]},
+             '/v4/spreadsheets/spam': SPREADSHEET,
+             '/v4/spreadsheets/spam/values:batchGet': {
+                 'valueRanges': [{'values': [[1, 2], [3, 'spam']]}]},
+             '/spreadsheets/d/spam/gviz/tq': (
+                 'google.visualization.Query.setResponse({"status": "ok", "table": {'
+                 '"cols": [{"type": "number"}], "rows": [{"c": [{"v": 3.0}]}]}});')}
+
+
+class Http:
+    """Fake server answering ``RESPONSES`` by URI path (404 otherwise)."""
+
+    def __init__(self):
+        self.uris = []
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        self.uris.append(uri)
+        if method == 'POST' and uri.endswith('/batch'):
+            return self.batch(uri, body, headers)
+        try:
+            response = RESPONSES[urllib.parse.urlsplit(uri).path]
+        except KeyError:
+            return httplib2.Response({'status': 404}), b'{"error": {"code": 404}}'
+        if not isinstance(response, str):
+            response = json.dumps(response)
+        info = {'status': 200, 'content-type': 'application/json; charset=UTF-8'}
+        return httplib2.Response(info), response.encode('utf-8')
+
+    def batch(self, uri, body, headers):
+        message = email.message_from_string(f'content-type: {headers["content-type"]}\n\n{body}')
+        parts = []
+        for part in message.get_payload():
+            path = part.get_payload().split(' ', 2)[1]
+            resp, content = self.request(urllib.parse.urljoin(uri, path))
+            parts.append(f'--batch_spam\r\nContent-Type: application/http\r\n'
+                         f'Content-ID: <response-{part["Content-ID"][1:]}\r\n\r\n'
+                         f'HTTP/1.1 {resp.status} OK\r\nContent-Type: application/json\r\n\r\n'
+                         f'{content.decode("utf-8")}\r\n')
+        info = {'status': 200, 'content-type': 'multipart/mixed; boundary=batch_spam'}
+        return httplib2.Response(info), ''.join(parts + ['--batch_spam--\r\n']).encode('utf-8')
+
+
+@pytest.fixture
+def recording(tmp_path):
+    filename = tmp_path / 'exchanges.jsonl'
+    http = replay.RecordingHttp(Http(), filename)
+    sheets = gsheets.Sheets(developer_key='secret', http=http)
+
+    assert sheets.titles() == ['Spam']
+    worksheet = sheets['spam'].sheets[0]
+    assert worksheet.values() == [[1, 2], [3, 'spam']]
+    assert worksheet.query('select A') == [[3]]
+    assert 'eggs' not in sheets
+
+    yield filename
+
+
+def test_recording(recording):
+    records = [json.loads(line) for line in recording.read_text().splitlines()]
+
+    assert [(r['method'], r['status']) for r in records] == [('GET', 200)] * 4 + [('GET', 404)]
+    assert not any('secret' in r['uri'] for r in records)
+    assert records[0]['uri'].startswith('https://www.googleapis.com/drive/v3/files?')
+    assert json.loads(records[1]['text']) == SPREADSHEET
+
+
+def test_replay(recording):
+    http = replay.ReplayHttp(recording)
+    sheets = gsheets.Sheets(http=http)
+
+    assert sheets.titles() == ['Spam']
+    spreadsheet = sheets['spam']
+    assert spreadsheet.title == 'Spam'
+    assert spreadsheet.sheets[0].values() == [[1, 2], [3, 'spam']]
+    assert spreadsheet.sheets[0].query('select A') == [[3]]
+    assert 'eggs' not in sheets
+    assert http.stats() == {'exchanges': 5, 'served': 5}
+    assert sheets.stats()['values.batchGet']['cells'] == 4
+
+
+def test_replay_prefetch(recording):
+    sheets = gsheets.Sheets(http=replay.ReplayHttp(recording))
+
+    assert [s.id for s in sheets.iter_prefetch()] == ['spam']
+
+
+def test_replay_get_many(tmp_path):
+    filename = tmp_path / 'exchanges.jsonl'
+    http = replay.RecordingHttp(Http(), filename)
+    recorded = gsheets.Sheets(developer_key='secret', http=http).get_many(['spam', 'eggs'])
+
+    http = replay.ReplayHttp(filename)
+    result = gsheets.Sheets(developer_key='other', http=http).get_many(['spam', 'eggs'])
+
+    assert recorded['spam'].sheets[0].values() == [[1, 2], [3, 'spam']]
+    assert result['spam'].sheets[0].values() == [[1, 2], [3, 'spam']]
+    assert isinstance(recorded['eggs'], KeyError) and isinstance(result['eggs'], KeyError)
+    assert http.stats() == {'exchanges': 2, 'served': 2}
+
+
+def test_replay_factory(recording):
+    https = []
+
+    def make_http():
+        http = replay.ReplayHttp(recording)
+        https.append(http)
+        return http
+
+    sheets = gsheets.Sheets(http=make_http)
+
+    assert [s.id for s in sheets.iter_prefetch()] == ['spam']
+    assert len(https) == 2  # drive service and sheets service of the worker thread
+    assert [h.stats()['served'] for h in https] == [1, 2]
+
+
+def test_replay_repeated(tmp_path):
+    filename = tmp_path / 'exchanges.jsonl'
+    http = Http()
+    recording = replay.RecordingHttp(http, filename)
+    for path in ['/spam', '/drive/v3/files', '/spam']:
+        recording.request(f'https://example.com{path}')
+    assert recording.uris == http.uris
+
+    http = replay.ReplayHttp(filename)
+    statuses = [http.request('https://example.com/spam')[0].status for _ in range(3)]
+    assert statuses == [404, 404, 404]
+
+    with pytest.raises(replay.NotRecorded, match=r'POST'):
+        http.request('https://example.com/spam', 'POST', body='{}')
+
+
+def test_replay_delay(mocker, recording):
+    sleep = mocker.patch('time.sleep', autospec=True)
+    http = replay.ReplayHttp(recording, latency=0.5, bandwidth=100)
+
+    resp, content = http.request('https://www.googleapis.com/drive/v3/files'
+                                 '?orderBy=folder%2Cname%2CcreatedTime&alt=json'
+                                 "&q=mimeType%3D%27application%2Fvnd.google-apps.spreadsheet%27")
+
+    assert resp.status == 200
+    assert resp['content-type'].startswith('application/json')
+    sleep.assert_called_once_with(0.5 + len(content) / 100)
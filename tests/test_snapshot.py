@@ -0,0 +1,151 @@
+import io
+import pickle
+
+import pytest
+
+from gsheets import models
+from gsheets import snapshot
+
+VALUES = [['Sp\xe4m', 1, 1.5, True, 2**70, '', None],
+          ['eggs', -2, 2.0, False, 1, '', 'ham'],
+          ['', 3, -0.5, 1, 2, '', 3.5]]
+
+
+@pytest.fixture
+def spreadsheet():
+    sheets = [models.WorkSheet(0, 'Spam1', 0, [row[:] for row in VALUES]),
+              models.WorkSheet(42, 'Spam2', 1, [[]], fill_value=None)]
+    yield models.SpreadSheet('spam', 'Spam', sheets, None)
+
+
+def test_dumps_loads(spreadsheet):
+    data = snapshot.dumps(spreadsheet)
+
+    infos = snapshot.loads(data)
+
+    assert [s['values'] for s in infos['sheets']] == [VALUES, [[]]]
+    assert [type(v) for v in infos['sheets'][0]['values'][2]] == [type(v) for v in VALUES[2]]
+    assert infos['sheets'][1]['fill_value'] is None
+
+
+def test_columns(spreadsheet):
+    header = snapshot.read_header(memoryview(snapshot.dumps(spreadsheet)))
+
+    columns = header['sheets'][0]['columns']
+    assert [c[0] for c in columns] == ['s', 'b', 'd', 'b', 'b', 'c', 'd']
+    assert [c[4] for c in columns] == [[], [], [], [[0, True], [1, False]], [[0, 2**70]],
+                                       [], [[0, None], [1, 'ham']]]
+    assert all(c[1] % snapshot.ALIGN == 0 for c in columns)
+
+
+def test_header_row():
+    values = [['sku', 'qty', 'price']]
+    values += [[f'SKU-{i:05d}', i % 50, i * 0.25] for i in range(1_000)]
+    ws = models.WorkSheet(0, 'Spam1', 0, [row[:] for row in values])
+    data = snapshot.dumps(models.SpreadSheet('spam', 'Spam', [ws], None))
+
+    header = snapshot.read_header(memoryview(data))
+
+    assert [c[0] for c in header['sheets'][0]['columns']] == ['s', 'b', 'd']
+    assert snapshot.loads(data)['sheets'][0]['values'] == values
+    assert len(data) < len(pickle.dumps(values))
+
+
+def test_dumps_invalid():
+    ws = models.WorkSheet(0, 'Spam1', 0, [['spam'], [b'eggs']])
+
+    with pytest.raises(TypeError, match=r'cannot store bytes value'):
+        snapshot.dumps(models.SpreadSheet('spam', 'Spam', [ws], None))
+
+
+def test_loads_invalid():
+    with pytest.raises(ValueError, match=r'too short'):
+        snapshot.loads(b'spam')
+
+    with pytest.raises(ValueError, match=r'bad magic'):
+        snapshot.loads(b'\x00' * 32)
+
+
+def test_loads_version(spreadsheet):
+    data = bytearray(snapshot.dumps(spreadsheet))
+    data[8:12] = (snapshot.VERSION + 1).to_bytes(4, 'little')
+
+    with pytest.raises(ValueError, match=r'unsupported snapshot version'):
+        snapshot.loads(data)
+
+
+def test_dump_load(spreadsheet):
+    with io.BytesIO() as fp:
+        spreadsheet.dump(fp)
+        fp.seek(0)
+        result = models.SpreadSheet.load(fp)
+
+    assert (result.id, result.title) == ('spam', 'Spam')
+    assert result.sheets.titles() == ['Spam1', 'Spam2']
+    assert result[0].values() == VALUES and result[0].spreadsheet is result
+    assert result[42].shape == (1, 0) and result[42].fill_value is None
+
+
+def test_pickle(spreadsheet):
+    result = pickle.loads(pickle.dumps(spreadsheet))
+
+    assert result[0].values() == VALUES and result[0].spreadsheet is result
+
+    ws = pickle.loads(pickle.dumps(spreadsheet[0]))
+
+    assert ws.values() == VALUES and ws.spreadsheet is None
+
+
+def test_attach(mocker, spreadsheet):
+    result = pickle.loads(pickle.dumps(spreadsheet))
+
+    with pytest.raises(RuntimeError, match=r'no Sheets instance'):
+        result.values_by_metadata('spam')
+
+    api = mocker.NonCallableMock(name='api')
+    result.attach(api)
+    batch = api._sheets.spreadsheets.return_value.values.return_value.batchGetByDataFilter
+    batch.return_value.execute.return_value = {}
+
+    assert result.values_by_metadata('spam') == {}
+
+
+@pytest.fixture
+def snapshot_file(tmp_path, spreadsheet):
+    filename = tmp_path / 'spam.gsheets'
+    with filename.open('wb') as f:
+        spreadsheet.dump(f)
+    yield filename
+
+
+def test_open_snapshot(snapshot_file):
+    ws = models.WorkSheet.open_snapshot(snapshot_file)
+
+    assert (ws.id, ws.title, ws.shape) == (0, 'Spam1', (3, 7))
+    assert ws._values[1] == VALUES[1] and ws._values[-1] == VALUES[-1]
+    assert ws['A1'] == 'Sp\xe4m' and ws['E1'] == 2**70
+    assert ws['B'] == [1, -2, 3] and ws['2':] == VALUES[1:]
+    assert ws.values() == VALUES and ws._values == VALUES
+    assert ws._values.column(2) == [1.5, 2.0, -0.5]
+    assert ws._values != object()
+    assert pickle.loads(pickle.dumps(ws)).values() == VALUES
+
+
+def test_query_detached(spreadsheet, snapshot_file):
+    for ws in [models.WorkSheet.open_snapshot(snapshot_file),
+               pickle.loads(pickle.dumps(spreadsheet[0])),
+               models.WorkSheet(0, 'Spam1', 0, VALUES)]:
+        with pytest.raises(RuntimeError, match=r'no Sheets instance attached'):
+            ws.query('select A')
+
+
+@pytest.mark.parametrize('sheet', [42, 'Spam2'])
+def test_open_snapshot_sheet(snapshot_file, sheet):
+    ws = models.WorkSheet.open_snapshot(snapshot_file, sheet)
+
+    assert ws.id == 42 and ws.shape == (1, 0) and ws.values() == [[]]
+
+
+def test_open_snapshot_fail(snapshot_file):
+    with pytest.raises(KeyError):
+        models.WorkSheet.open_snapshot(snapshot_file, 'Eggs')
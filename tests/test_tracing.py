@@ -0,0 +1,100 @@
+import contextlib
+import contextvars
+import sys
+
+import pytest
+
+import gsheets
+from gsheets import tracing
+
+
+class Tracer:
+
+    def __init__(self):
+        self.current = contextvars.ContextVar('current', default=None)
+        self.spans = []
+
+    @contextlib.contextmanager
+    def start_as_current_span(self, name, attributes):
+        self.spans.append((name, self.current.get(), attributes))
+        token = self.current.set(name)
+        try:
+            yield name
+        finally:
+            self.current.reset(token)
+
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    assert tracing.enable(tracer)
+    yield tracer
+    tracing.disable()
+
+
+@pytest.mark.usefixtures('spreadsheet_values')
+def test_spans(mocker, tracer):
+    sheets = gsheets.Sheets(credentials=mocker.sentinel.credentials)
+
+    with tracer.start_as_current_span('app', attributes={}):
+        sheets['spam']
+
+    assert tracer.spans == [
+        ('app', None, {}),
+        ('gsheets.fetch', 'app', {'gsheets.spreadsheet_id': 'spam'}),
+        ('gsheets.spreadsheets.get', 'gsheets.fetch', {'gsheets.spreadsheet_id': 'spam'}),
+        ('gsheets.values.batchGet', 'gsheets.fetch', {'gsheets.spreadsheet_id': 'spam',
+                                                      'gsheets.ranges': 1}),
+    ]
+
+
+@pytest.mark.usefixtures('files', 'spreadsheet_values')
+def test_spans_threads(mocker, tracer, open_):
+    sheets = gsheets.Sheets(credentials=mocker.sentinel.credentials)
+
+    with tracer.start_as_current_span('app', attributes={}):
+        (sheet,) = sheets.iter_prefetch()
+    sheet[0].to_csv()
+
+    assert [(name, parent) for name, parent, _ in tracer.spans] == [
+        ('app', None),
+        ('gsheets.files.list', 'app'),
+        ('gsheets.fetch', 'app'),
+        ('gsheets.spreadsheets.get', 'gsheets.fetch'),
+        ('gsheets.values.batchGet', 'gsheets.fetch'),
+        ('gsheets.export.csv', None),
+    ]
+    assert tracer.spans[1][2] == {'gsheets.page': 0}
+
+
+def test_disabled():
+    assert not tracing.enabled()
+    assert tracing.span('spam') is tracing.NULL_SPAN
+
+    with tracing.span('spam'):
+        pass
+
+
+def test_enable_opentelemetry(mocker):
+    trace = mocker.NonCallableMock()
+    mocker.patch.dict(sys.modules, {'opentelemetry': mocker.NonCallableMock(trace=trace),
+                                    'opentelemetry.trace': trace})
+
+    try:
+        assert tracing.enable() and tracing.enabled()
+        trace.get_tracer.assert_called_once_with('gsheets', gsheets.__version__)
+
+        tracing.span('gsheets.fetch', spreadsheet_id='spam', ranges=None)
+
+        span = trace.get_tracer.return_value.start_as_current_span
+        span.assert_called_once_with('gsheets.fetch',
+                                     attributes={'gsheets.spreadsheet_id': 'spam'})
+    finally:
+        tracing.disable()
+
+
+def test_enable_unavailable(mocker):
+    mocker.patch.dict(sys.modules, {'opentelemetry': None})
+
+    assert not tracing.enable()
+    assert not tracing.enabled()
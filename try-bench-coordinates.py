@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+"""Time ``WorkSheet.__getitem__`` coordinate parsing with and without cache."""
+
+import timeit
+
+from gsheets import coordinates
+from gsheets.models import WorkSheet
+
+NUMBER = 100_000
+
+KEYS = ['C7', 'B', '3', slice('A1', 'D4')]
+
+
+ws = WorkSheet(0, 'Spam', 0, [list(range(10)) for _ in range(10)])
+
+for key in KEYS:
+    uncached = timeit.timeit(lambda: coordinates.Coordinates._from_string(key)
+                             if isinstance(key, str)
+                             else coordinates.Slice.from_slice(key),
+                             number=NUMBER)
+    cached = timeit.timeit(lambda: coordinates.Coordinates.from_string(key),
+                           number=NUMBER)
+    getitem = timeit.timeit(lambda: ws[key], number=NUMBER)
+    accessor = coordinates.compile(key)
+    compiled = timeit.timeit(lambda: accessor(ws._values), number=NUMBER)
+    print(f'{key!r:26} parse {uncached:.3f}s  cached {cached:.3f}s'
+          f'  ws[key] {getitem:.3f}s  compiled {compiled:.3f}s')
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+"""Measure imports of gsheets with ``python -X importtime`` in fresh interpreters.
+
+Reports the median import time (top-level imports minus interpreter startup)
+and which heavy dependencies got loaded.
+"""
+
+import statistics
+import subprocess
+import sys
+
+REPEAT = 10
+
+URL = 'https://docs.google.com/spreadsheets/d/spam'
+
+STATEMENTS = ['import gsheets',
+              f'import gsheets; gsheets.urls.SheetUrl.from_string({URL!r})',
+              'import gsheets; gsheets.backend.apiclient',
+              'import gsheets; gsheets.oauth2.client']
+
+HEAVY = ['apiclient', 'googleapiclient', 'oauth2client', 'httplib2', 'pandas',
+         'concurrent.futures', 'logging', 'sqlite3']
+
+
+def importtime(statement: str) -> tuple[int, list[str]]:
+    """Return microseconds of top-level imports and the loaded heavy modules."""
+    check = f'import sys; print(*[m for m in {HEAVY!r} if m in sys.modules])'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'{statement}; {check}'],
+                          capture_output=True, text=True, check=True)
+    total = 0
+    for line in proc.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('package'):
+            _, cumulative, name = line.split('|')
+            if not name[1:].startswith(' '):  # top-level
+                total += int(cumulative)
+    return total, proc.stdout.split()
+
+
+baseline = statistics.median(importtime('pass')[0] for _ in range(REPEAT))
+
+for statement in STATEMENTS:
+    runs = [importtime(statement) for _ in range(REPEAT)]
+    median = statistics.median(t for t, _ in runs) - baseline
+    heavy = ', '.join(runs[-1][1]) or '-'
+    print(f'{statement:64} {median / 1000:7.1f} ms  heavy: {heavy}')
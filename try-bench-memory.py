@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""Measure per-object memory of models and coordinates with tracemalloc.
+
+Compares the slotted classes with ``__dict__``-based subclasses of them
+(the memory layout before ``__slots__``).
+"""
+
+import tracemalloc
+
+from gsheets import coordinates
+from gsheets import models
+from gsheets import urls
+
+NUMBER = 10_000
+
+
+def measure(make, number=NUMBER):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [make(i) for i in range(number)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return (after - before) / number
+
+
+def with_dict(cls):
+    """Return subclass of ``cls`` with per-instance ``__dict__`` (no ``__slots__``)."""
+    return type(cls.__name__, (cls,), {})
+
+
+def make_spreadsheet(cls):
+    return lambda i: cls(str(i), 'Spam', [], None)
+
+
+def make_worksheet(cls):
+    return lambda i: cls(i, 'Spam', 0, [])
+
+
+CLASSES = [(urls.SheetUrl, lambda cls: lambda i: cls(str(i))),
+           (models.SpreadSheet, make_spreadsheet),
+           (models.WorkSheet, make_worksheet),
+           (models.SheetsView, lambda cls: lambda i: cls([])),
+           (coordinates.Cell, lambda cls: lambda i: cls(i, i)),
+           (coordinates.StartCellStopCell, lambda cls: lambda i: cls(0, 0, i, i))]
+
+print(f'{"":20} {"__dict__":>8} {"__slots__":>9}  bytes/object')
+for cls, factory in CLASSES:
+    before = measure(factory(with_dict(cls)))
+    after = measure(factory(cls))
+    print(f'{cls.__name__:20} {before:8.1f} {after:9.1f}  ({before - after:.1f} saved)')
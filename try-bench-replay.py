@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""Measure fetch throughput and peak memory against recorded API responses.
+
+Replays the exchanges recorded with ``gsheets.replay.RecordingHttp`` in the
+JSON lines file given as first argument (default: record synthetic
+spreadsheets into a temporary file) with simulated latency and bandwidth.
+"""
+
+import json
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.parse
+
+import httplib2
+
+import gsheets
+from gsheets import replay
+
+SPREADSHEETS = 20
+
+ROWS, COLS = 1_000, 10
+
+LATENCY = 0.05  # seconds
+
+BANDWIDTH = 10_000_000  # bytes per second
+
+
+class SyntheticHttp:
+    """Fake server with ``SPREADSHEETS`` spreadsheets of ``ROWS`` x ``COLS`` values."""
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        path = urllib.parse.urlsplit(uri).path
+        if path == '/drive/v3/files':
+            response = {'files': [{'id': f'spam{i}', 'name': f'Spam {i}'}
+                                  for i in range(SPREADSHEETS)]}
+        elif path.endswith(':batchGet'):
+            values = [[f'spam{i}', i, i * 0.5] + [f'eggs{j}' for j in range(COLS - 3)]
+                      for i in range(ROWS)]
+            response = {'valueRanges': [{'values': values}]}
+        else:
+            id = path.rpartition('/')[2]
+            response = {'spreadsheetId': id, 'properties': {'title': id},
+                        'sheets': [{'properties': {'title': 'Spam1', 'sheetId': 0,
+                                                   'index': 0}}]}
+        info = {'status': 200, 'content-type': 'application/json; charset=UTF-8'}
+        return httplib2.Response(info), json.dumps(response).encode('utf-8')
+
+
+def record(filename) -> None:
+    sheets = gsheets.Sheets(http=replay.RecordingHttp(SyntheticHttp(), filename))
+    for _ in sheets:
+        pass
+
+
+def run(filename, fetch, **kwargs) -> tuple[int, float, replay.ReplayHttp]:
+    http = replay.ReplayHttp(filename, **kwargs)
+    sheets = gsheets.Sheets(http=http)
+    sheets._sheets, sheets._drive  # exclude service discovery
+    start = time.perf_counter()
+    n = sum(1 for _ in fetch(sheets))
+    return n, time.perf_counter() - start, http
+
+
+def measure(name, filename, fetch, **kwargs) -> None:
+    n, seconds, http = run(filename, fetch, **kwargs)
+    tracemalloc.start()
+    run(filename, fetch, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:32} {n / seconds:8.1f} spreadsheets/s'
+          f' {peak / 2**20:8.1f} MiB peak  ({http.stats()["served"]} responses)')
+
+
+if len(sys.argv) > 1:
+    filename = pathlib.Path(sys.argv[1])
+else:
+    filename = pathlib.Path(tempfile.mkdtemp()) / 'exchanges.jsonl'
+    record(filename)
+
+for kwargs in [{}, {'latency': LATENCY, 'bandwidth': BANDWIDTH}]:
+    settings = ', '.join(f'{k}={v}' for k, v in kwargs.items()) or 'no delay'
+    print(f'# {settings}')
+    measure('iter(sheets)', filename, iter, **kwargs)
+    measure('sheets.iter_prefetch()', filename,
+            lambda sheets: sheets.iter_prefetch(), **kwargs)